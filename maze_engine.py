@@ -0,0 +1,173 @@
+"""
+Headless maze algorithms: the image is decoded once into a Grid (one
+palette index per pixel in a flat array) and the searches work on
+linear indices, so nothing here needs pygame or a display.  maze.py is
+the pygame front end
+"""
+import array
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Grid:
+    """
+    Image as palette indices: cells[row * width + col] indexes palette,
+    the list of (r, g, b) colors in use.  Cells are bytes until a 257th
+    color shows up, then 16-bit
+    """
+    def __init__(self,width,height,cells,palette):
+        self.width, self.height = width, height
+        self.cells, self.palette = cells, list(palette)
+        self.lookup = {color: i for i,color in enumerate(self.palette)}
+
+    @classmethod
+    def from_rows(cls,rows):
+        """Grid from a list of rows of (r, g, b) tuples"""
+        palette, lookup, codes = [], {}, []
+        for row in rows:
+            for color in row:
+                color = tuple(color)
+                if color not in lookup:
+                    lookup[color] = len(palette)
+                    palette.append(color)
+                codes.append(lookup[color])
+        typecode = 'B' if len(palette) <= 256 else 'H'
+        return cls(len(rows[0]) if rows else 0,len(rows),array.array(typecode,codes),palette)
+
+    @classmethod
+    def from_surface(cls,surface,scale = 1):
+        """
+        Grid from a pygame surface, sampling every scale-th pixel (as
+        maze.get_pixel does); with NumPy the surface is decoded in one go
+        """
+        width, height = surface.get_width() // scale, surface.get_height() // scale
+        if numpy is not None:
+            import pygame.surfarray
+            pixels = pygame.surfarray.array3d(surface)[:width * scale:scale,:height * scale:scale]
+            packed = pixels.transpose(1,0,2).astype(numpy.uint32)
+            packed = packed[...,0] << 16 | packed[...,1] << 8 | packed[...,2]
+            colors, codes = numpy.unique(packed.ravel(),return_inverse = True)
+            palette = [(int(c) >> 16,int(c) >> 8 & 255,int(c) & 255) for c in colors]
+            typecode = 'B' if len(palette) <= 256 else 'H'
+            codes = codes.astype(numpy.uint8 if typecode == 'B' else numpy.uint16)
+            return cls(width,height,array.array(typecode,codes.tobytes()),palette)
+        return cls.from_rows([[tuple(surface.get_at((col * scale,row * scale)))[:3]
+            for col in range(width)] for row in range(height)])
+
+    @classmethod
+    def from_file(cls,path,scale = 1):
+        """Grid from an image file (loaded with pygame, no display needed)"""
+        import pygame
+        return cls.from_surface(pygame.image.load(path),scale)
+
+    def index(self,row,col):
+        return row * self.width + col
+
+    def code(self,color):
+        """Palette index of color, adding it if new"""
+        color = tuple(color)
+        if color not in self.lookup:
+            if len(self.palette) == 256 and self.cells.typecode == 'B':
+                self.cells = array.array('H',self.cells)
+            self.lookup[color] = len(self.palette)
+            self.palette.append(color)
+        return self.lookup[color]
+
+    def get(self,row,col):
+        """Color at (row, col), or None off the grid"""
+        if 0 <= row < self.height and 0 <= col < self.width:
+            return self.palette[self.cells[self.index(row,col)]]
+        return None
+
+    def set(self,row,col,color):
+        self.cells[self.index(row,col)] = self.code(color)
+
+    def neighbors(self,index):
+        """Linear indices below, above, right and left of index (on the grid)"""
+        width = self.width
+        out = []
+        if index + width < len(self.cells):
+            out.append(index + width)
+        if index >= width:
+            out.append(index - width)
+        col = index % width
+        if col + 1 < width:
+            out.append(index + 1)
+        if col:
+            out.append(index - 1)
+        return out
+
+    def to_rows(self):
+        palette, width = self.palette, self.width
+        return [[palette[code] for code in self.cells[row * width:(row + 1) * width]]
+            for row in range(self.height)]
+
+def flood_fill(grid,location,new_color):
+    """
+    Recolor the 4-connected region of location's color with new_color
+    (BFS; recoloring doubles as the visited mark)
+    Returns the linear indices of the recolored cells
+    """
+    start = grid.index(*location)
+    new = grid.code(new_color)
+    cells = grid.cells
+    old = cells[start]
+    if old == new:
+        return []
+    cells[start] = new
+    width, size = grid.width, len(cells)
+    filled, queue = [start], collections.deque([start])
+    pop, push = queue.popleft, queue.append
+    while queue:
+        index = pop()
+        col = index % width
+        # the four neighbors, inlined (this runs once per pixel filled)
+        if index + width < size and cells[index + width] == old:
+            cells[index + width] = new
+            filled.append(index + width)
+            push(index + width)
+        if index >= width and cells[index - width] == old:
+            cells[index - width] = new
+            filled.append(index - width)
+            push(index - width)
+        if col + 1 < width and cells[index + 1] == old:
+            cells[index + 1] = new
+            filled.append(index + 1)
+            push(index + 1)
+        if col and cells[index - 1] == old:
+            cells[index - 1] = new
+            filled.append(index - 1)
+            push(index - 1)
+    return filled
+
+def find_path(grid,start_location,goal_color):
+    """
+    Shortest path from start_location through cells of its own color to
+    the first cell of goal_color (BFS, parents kept as linear indices
+    instead of copying paths)
+    Returns the path as (row, col) tuples, goal cell last, or None
+    """
+    goal = grid.lookup.get(tuple(goal_color))
+    if goal is None:
+        return None
+    cells, width = grid.cells, grid.width
+    start = grid.index(*start_location)
+    safe = cells[start]
+    parent, queue = {start: None}, collections.deque([start])
+    while queue:
+        index = queue.popleft()
+        for nxt in grid.neighbors(index):
+            if cells[nxt] == goal:
+                path = [nxt]
+                while index is not None:
+                    path.append(index)
+                    index = parent[index]
+                return [divmod(i,width) for i in reversed(path)]
+            if nxt not in parent and cells[nxt] == safe:
+                parent[nxt] = index
+                queue.append(nxt)
+    return None
@@ -1,8 +1,29 @@
+import array
+import functools
+import itertools
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# new_game_nd only builds with NumPy once the bombs touch about this many
+# cells (bombs * 3**d); below it the per-call overhead costs more
+NUMPY_MIN_WORK = 64
+
+
 def dump(game):
     """
     Prints a human-readable version of a game (provided as a dictionary)
     """
     for key, val in sorted(game.items()):
+        if key == 'remaining':
+            # bookkeeping for dig_nd, not part of the game's contents
+            continue
         if isinstance(val, list) and val and isinstance(val[0], list):
             print(f'{key}:')
             for inner in val:
@@ -11,12 +32,6 @@ def dump(game):
             print(f'{key}:', val)
 
 
-def all_coord(dim):
-    """Returns a list of all coordinates"""
-    if len(dim) == 1:
-        return [(i,) for i in range(dim[0])]
-    return [j + (i,) for j in all_coord(dim[:-1]) for i in range(dim[-1])]
-
 def neighbors(c,dim):
     """
     Determines the neighbors of a coordinate, c, in
@@ -30,21 +45,6 @@ def neighbors(c,dim):
         return one(0)
     return [i + j for i in neighbors(c[:-1],dim[:-1]) for j in one(-1)]
 
-def check(g,coords,target):
-    """
-    Check board and hidden for each
-    coordinate to determine if victory (change if so)
-    """
-    bo,hi = g['board'],g['hidden']
-    if target == '.':
-        g['state'] = 'defeat'
-        return 1
-    for coord in coords:
-        if get(hi,coord) and get(bo,coord) != '.':
-            return 1
-    g['state'] = 'victory'
-    return 0
-
 # 2-D IMPLEMENTATION
 
 
@@ -200,14 +200,7 @@ def render_2d_board(game, xray=False):
     ...                            [True, True, False, True]]})
     '.31_\\n__1_'
     """
-    last_row, bo = game['dimensions'][0] - 1, render_2d_locations(game,xray)
-    string = ''
-    for ind,row in enumerate(bo):
-        for char in row: 
-            string += char
-        if ind != last_row:
-            string += '\n'
-    return string
+    return '\n'.join(''.join(row) for row in render_rows(game,xray))
 
 
 # N-D IMPLEMENTATION
@@ -224,18 +217,13 @@ def get(bo,target,whole = True):
     Else, gets the list that the elem is in (use this when
     you want to change that elem)
     """
-    x = bo[:]
+    x = bo
     for i in range(len(target) -1):
         x = x[target[i]]
     if whole:
         x = x[target[-1]]
     return x 
 
-def shorten(game):
-    """Make it easier to name"""
-    return (game['dimensions'],game['state'],game['board'],
-        game['hidden'],all_coord(game['dimensions']))
-
 def new_game_nd(dimensions, bombs):
     """
     Start a new game.
@@ -251,24 +239,75 @@ def new_game_nd(dimensions, bombs):
 
     Returns:
        A game state dictionary
+
+    With NumPy installed, boards with enough bombs (NUMPY_MIN_WORK) are
+    built by numpy_board instead of one bomb at a time (same board
+    either way)
     """
-    game = board(dimensions,0)
-    for bomb in bombs:
-        get(game,bomb,False)[bomb[-1]] = '.'
-        for neighbor in neighbors(bomb,dimensions):
-            if get(game,neighbor) != '.':
-                get(game,neighbor,False)[neighbor[-1]] += 1
+    if numpy is not None and len(bombs) * 3 ** len(dimensions) >= NUMPY_MIN_WORK:
+        game = numpy_board(dimensions,bombs)
+    else:
+        game = board(dimensions,0)
+        for bomb in bombs:
+            get(game,bomb,False)[bomb[-1]] = '.'
+            for neighbor in neighbors(bomb,dimensions):
+                if get(game,neighbor) != '.':
+                    get(game,neighbor,False)[neighbor[-1]] += 1
+    cells = flatten(game,len(dimensions))
     return {
         'board': game,
         'dimensions': dimensions,
         'hidden': board(dimensions,True),
+        'remaining': len(cells) - cells.count('.'),
         'state': 'ongoing'
     }
 
 
-def dig_nd(game, coordinates):
+def cell(bo,coordinates):
+    """Element of a nested board (no copying, unlike get)"""
+    for i in coordinates:
+        bo = bo[i]
+    return bo
+
+def around(coordinates,dimensions):
+    """Coordinates of the cells around coordinates (not itself)"""
+    for delta in neighbor_deltas(edge_key(coordinates,dimensions)):
+        yield tuple(c + d for c,d in zip(coordinates,delta))
+
+def hidden_safe(game):
+    """Number of hidden cells without a bomb (one pass over the board)"""
+    depth = len(game['dimensions'])
+    return sum(1 for val,hid in zip(flatten(game['board'],depth),flatten(game['hidden'],depth))
+        if hid and val != '.')
+
+def numpy_board(dimensions,bombs):
+    """
+    Nested-list board for new_game_nd, vectorized: bombs are counted
+    into a mask (a bomb listed twice counts twice, as in the loop), the
+    mask is box-summed one axis at a time (each axis a sum of three
+    shifted slices of the padded array, 3 * N array adds for 3^N
+    neighbors) and bomb cells are then set to '.'
     """
-    Recursively dig up square at coords and neighboring squares.
+    mask = numpy.zeros(tuple(dimensions),dtype=numpy.int64)
+    if len(bombs):
+        numpy.add.at(mask,tuple(numpy.asarray(bombs).T),1)
+    total = mask
+    for axis,size in enumerate(dimensions):
+        pad = [(0,0)] * len(dimensions)
+        pad[axis] = (1,1)
+        padded = numpy.pad(total,pad)
+        window = [slice(None)] * len(dimensions)
+        total = 0
+        for shift in range(3):
+            window[axis] = slice(shift,shift + size)
+            total = total + padded[tuple(window)]
+    game = total.astype(object)
+    game[mask > 0] = '.'
+    return game.tolist()
+
+def dig_nd(game, coordinates, revealed=None):
+    """
+    Dig up square at coords and, flood-fill style, neighboring squares.
 
     Update the hidden to reveal square at coords; then recursively reveal its
     neighbors, as long as coords does not contain and is not adjacent to a
@@ -280,24 +319,47 @@ def dig_nd(game, coordinates):
     board after digging, 'victory' when all safe squares (squares that do
     not contain a bomb) and no bombs are revealed, and 'ongoing' otherwise.
 
+    The fill uses an explicit stack, and game['remaining'] counts the
+    hidden safe squares (counted once if the game does not have it yet),
+    so victory is known without scanning the board.
+
     Args:
        coordinates (tuple): Where to start digging
+       revealed (list): If given, the coordinates of every square revealed
+                        are appended to it (see render_cells)
 
     Returns:
        int: number of squares revealed
     """
-    dim,state,bo,hid,coords = shorten(game)
-    def recursive(game,coordinates):
-        if state != 'ongoing' or not get(hid,coordinates):
-            return 0 
-        get(hid,coordinates,False)[coordinates[-1]],count = False,1
-        current = get(bo,coordinates)
-        if current == 0:
-            count += sum(recursive(game,c) if get(bo,c) != '.' and get(hid,c)
-                else 0 for c in neighbors(coordinates,dim))
-        check(game,coords,current)
-        return count
-    return recursive(game,coordinates)
+    bo,hid = game['board'],game['hidden']
+    if game['state'] != 'ongoing' or not cell(hid,coordinates):
+        return 0
+    if 'remaining' not in game:
+        game['remaining'] = hidden_safe(game)
+    dim = tuple(game['dimensions'])
+    cell(hid,coordinates[:-1])[coordinates[-1]] = False
+    if revealed is not None:
+        revealed.append(tuple(coordinates))
+    if cell(bo,coordinates) == '.':
+        game['state'] = 'defeat'
+        return 1
+    count, stack = 1, [coordinates]
+    while stack:
+        coords = stack.pop()
+        if cell(bo,coords) != 0:
+            continue
+        for c in around(coords,dim):
+            row = cell(hid,c[:-1])
+            if row[c[-1]] and cell(bo,c) != '.':
+                row[c[-1]] = False
+                count += 1
+                stack.append(c)
+                if revealed is not None:
+                    revealed.append(c)
+    game['remaining'] -= count
+    if not game['remaining']:
+        game['state'] = 'victory'
+    return count
 
 
 def render_nd(game, xray=False):
@@ -317,11 +379,481 @@ def render_nd(game, xray=False):
     Returns:
        An n-dimensional array of strings (nested lists)
     """
-    element = lambda a,hid: '_' if hid and not xray else ' ' \
-        if a == 0 else str(a) if isinstance(a,int) else a
-    def deep_copy(b,h):
-        return [element(i,j) if not isinstance(i,list) \
-            else deep_copy(i,j) for i,j in zip(b,h)]
-    return deep_copy(game['board'],game['hidden'])
+    return render_window(game,xray)
+
+
+def render_cell(val,hid,xray=False):
+    """One square as render_nd shows it"""
+    if hid and not xray:
+        return '_'
+    if val == 0:
+        return ' '
+    return str(val) if isinstance(val,int) else val
+
+def render_window(game,xray=False,window=None):
+    """
+    render_nd for part of the board: window is a (start, stop) range per
+    axis (default the whole board), and only those squares are drawn
+    """
+    dim = game['dimensions']
+    window = window or [(0,n) for n in dim]
+    last = len(dim) - 1
+    def draw(bo,hi,axis):
+        lo,up = window[axis]
+        if axis == last:
+            return [render_cell(bo[i],hi[i],xray) for i in range(lo,up)]
+        return [draw(bo[i],hi[i],axis + 1) for i in range(lo,up)]
+    return draw(game['board'],game['hidden'],0)
+
+def render_rows(game,xray=False,window=None):
+    """
+    Like render_window, but yields the innermost rows one at a time (in
+    row-major order) instead of building the whole nested list
+    """
+    dim = game['dimensions']
+    window = window or [(0,n) for n in dim]
+    lo,up = window[-1]
+    for prefix in itertools.product(*(range(a,b) for a,b in window[:-1])):
+        bo,hi = cell(game['board'],prefix),cell(game['hidden'],prefix)
+        yield [render_cell(bo[i],hi[i],xray) for i in range(lo,up)]
+
+def render_cells(game,cells,xray=False):
+    """
+    (coordinates, square) for just the given squares: with the list
+    dig_nd fills in, the squares that changed since the last frame
+
+    >>> game = new_game_2d(2, 4, [(0, 0), (1, 0), (1, 1)])
+    >>> changed = []
+    >>> dig_nd(game, (0, 3), changed)
+    4
+    >>> sorted(render_cells(game, changed))
+    [((0, 2), '1'), ((0, 3), ' '), ((1, 2), '1'), ((1, 3), ' ')]
+    """
+    return [(c,render_cell(cell(game['board'],c),cell(game['hidden'],c),xray)) for c in cells]
+
+
+# FLAT N-D IMPLEMENTATION
+@functools.lru_cache(maxsize=None)
+def strides(dimensions):
+    """Row-major strides: linear index = sum(coord[i] * strides[i])"""
+    out, step = [], 1
+    for size in reversed(dimensions):
+        out.append(step)
+        step *= size
+    return tuple(reversed(out))
+
+@functools.lru_cache(maxsize=4096)
+def neighbor_deltas(key):
+    """
+    Coordinate steps to the neighbors of a cell (not the cell itself)
+    on the edges given by key, a tuple of per-axis edge classes (0
+    inside, 1 first, 2 last, 3 both when that axis has size 1)
+    Built per key on first use: a d-D board has 3 ** d classes, most of
+    which a game never touches
+    """
+    deltas = {0: (-1,0,1), 1: (0,1), 2: (-1,0), 3: (0,)}
+    return tuple(delta for delta in itertools.product(*(deltas[k] for k in key)) if any(delta))
+
+def edge_key(coordinates,dimensions):
+    """Edge classes of coordinates, the key of neighbor_deltas"""
+    return tuple((c == 0) | (c == n - 1) << 1 for c,n in zip(coordinates,dimensions))
+
+@functools.lru_cache(maxsize=4096)
+def neighbor_offsets(dimensions,key):
+    """neighbor_deltas(key) as linear-index offsets"""
+    steps = strides(dimensions)
+    return tuple(sum(d * s for d,s in zip(delta,steps)) for delta in neighbor_deltas(key))
+
+def neighbor_indices(index,dimensions):
+    """Linear indices of the cells around a linear index"""
+    coordinates = [index // s % n for s,n in zip(strides(dimensions),dimensions)]
+    return [index + off for off in neighbor_offsets(dimensions,edge_key(coordinates,dimensions))]
+
+def nest(values,dimensions):
+    """Flat row-major list -> nested lists with the given dimensions"""
+    for size in reversed(dimensions[1:]):
+        values = [values[i:i + size] for i in range(0,len(values),size)]
+    return values
+
+def flatten(nested,depth):
+    """Nested lists -> flat row-major list (inverse of nest)"""
+    for _ in range(depth - 1):
+        nested = [x for inner in nested for x in inner]
+    return nested
+
+class FlatBoard:
+    """
+    N-D game on contiguous storage: counts is an array with one entry
+    per cell in row-major order (bomb for a bomb, else the neighbor
+    count) and hidden a bytearray of 0/1 flags, both indexed by
+    linear index sum(coord[i] * strides[i]); neighbors come from the
+    offset tables of neighbor_offsets, built once per dimensions
+    and edge class (see neighbor_indices)
+
+    remaining counts the hidden safe cells, so victory is noticed in O(1)
+    from_game/to_game convert to and from the nested-list game dict
+
+    >>> flat = FlatBoard((2, 4), [(0, 0), (1, 0), (1, 1)])
+    >>> flat.dig((0, 3)), flat.state, flat.remaining
+    (4, 'ongoing', 1)
+    >>> dump(flat.to_game())
+    board:
+        ['.', 3, 1, 0]
+        ['.', '.', 1, 0]
+    dimensions: (2, 4)
+    hidden:
+        [True, True, False, False]
+        [True, True, False, False]
+    state: ongoing
+    >>> FlatBoard.from_game(flat.to_game()).to_game() == flat.to_game()
+    True
+    """
+    def __init__(self,dimensions,bombs = ()):
+        self.dimensions = tuple(dimensions)
+        self.strides = strides(self.dimensions)
+        self.size = self.strides[0] * self.dimensions[0]
+        # 3 ** n - 1 neighbors at most, so bytes do up to 5 dimensions and
+        # 16 bits up to 10; the top value of the type marks a bomb
+        most = 3 ** len(self.dimensions) - 1
+        typecode = next(code for code in 'BHIQ' if most < 2 ** (8 * array.array(code).itemsize) - 1)
+        self.bomb = 2 ** (8 * array.array(typecode).itemsize) - 1
+        self.counts = array.array(typecode,bytes(self.size * array.array(typecode).itemsize))
+        self.hidden = bytearray(b'\x01') * self.size
+        self.state = 'ongoing'
+        counts, bomb = self.counts, self.bomb
+        for coord in bombs:
+            cell = self.index(coord)
+            counts[cell] = bomb
+            for nxt in self.neighbors(cell):
+                if counts[nxt] != bomb:
+                    counts[nxt] += 1
+        self.remaining = self.size - sum(1 for val in counts if val == bomb)
+
+    def index(self,coord):
+        return sum(c * s for c,s in zip(coord,self.strides))
+
+    def coord(self,index):
+        return tuple(index // s % n for s,n in zip(self.strides,self.dimensions))
+
+    def neighbors(self,index):
+        return neighbor_indices(index,self.dimensions)
+
+    def value(self,index):
+        """Cell as in the game dict: '.' or the neighbor count"""
+        val = self.counts[index]
+        return '.' if val == self.bomb else val
+
+    def dig(self,coordinates):
+        """dig_nd on the flat board (explicit queue, no recursion)"""
+        if self.state != 'ongoing':
+            return 0
+        start = self.index(coordinates)
+        if not self.hidden[start]:
+            return 0
+        counts, hidden, bomb = self.counts, self.hidden, self.bomb
+        hidden[start] = 0
+        if counts[start] == bomb:
+            self.state = 'defeat'
+            return 1
+        revealed, queue = 1, [start]
+        while queue:
+            cell = queue.pop()
+            if counts[cell]:
+                continue
+            for nxt in self.neighbors(cell):
+                if hidden[nxt] and counts[nxt] != bomb:
+                    hidden[nxt] = 0
+                    revealed += 1
+                    queue.append(nxt)
+        self.remaining -= revealed
+        if not self.remaining:
+            self.state = 'victory'
+        return revealed
+
+    @classmethod
+    def from_game(cls,game):
+        """FlatBoard holding the same board, hidden flags and state as a game dict"""
+        dimensions = tuple(game['dimensions'])
+        flat = cls(dimensions)
+        values = flatten(game['board'],len(dimensions))
+        flat.counts = array.array(flat.counts.typecode,
+            (flat.bomb if val == '.' else val for val in values))
+        flat.hidden = bytearray(map(bool,flatten(game['hidden'],len(dimensions))))
+        flat.state = game['state']
+        flat.remaining = sum(1 for val,hid in zip(flat.counts,flat.hidden)
+            if hid and val != flat.bomb)
+        return flat
+
+    def to_game(self):
+        """The nested-list game dict (as new_game_nd makes)"""
+        return {
+            'board': nest([self.value(i) for i in range(self.size)],self.dimensions),
+            'dimensions': self.dimensions,
+            'hidden': nest([bool(h) for h in self.hidden],self.dimensions),
+            'remaining': self.remaining,
+            'state': self.state
+        }
+
+
+# SPARSE N-D IMPLEMENTATION
+class SparseGame:
+    """
+    N-D game for boards far too big to allocate: only the bombs (a set
+    of linear indices), the revealed cells (another set) and the
+    neighbor counts of revealed cells (computed on reveal, memoized)
+    are stored, so memory grows with bombs + revealed cells, not with
+    the volume of the board
+
+    dig and render follow dig_nd and render_nd; render takes a window so
+    only part of a huge board is drawn
+
+    >>> game = SparseGame((2, 4), [(0, 0), (1, 0), (1, 1)])
+    >>> game.dig((0, 3)), game.state
+    (4, 'ongoing')
+    >>> game.render()
+    [['_', '_', '1', ' '], ['_', '_', '1', ' ']]
+    >>> game.render(xray=True, window=((0, 2), (1, 3)))
+    [['3', '1'], ['.', '1']]
+    >>> game.dig((0, 1)), game.state
+    (1, 'victory')
+    """
+    def __init__(self,dimensions,bombs):
+        self.dimensions = tuple(dimensions)
+        self.strides = strides(self.dimensions)
+        self.size = self.strides[0] * self.dimensions[0]
+        self.bombs = {self.index(bomb) for bomb in bombs}
+        self.revealed, self.counts, self.dug = set(), {}, 0
+        self.state = 'ongoing'
+
+    def index(self,coord):
+        return sum(c * s for c,s in zip(coord,self.strides))
+
+    def count(self,index,memo = True):
+        """Bombs around index"""
+        if index in self.counts:
+            return self.counts[index]
+        val = sum(1 for nxt in neighbor_indices(index,self.dimensions) if nxt in self.bombs)
+        if memo:
+            self.counts[index] = val
+        return val
+
+    @property
+    def remaining(self):
+        """Hidden safe cells"""
+        return self.size - len(self.bombs) - self.dug
+
+    def dig(self,coordinates):
+        """dig_nd on the sparse board"""
+        start = self.index(coordinates)
+        if self.state != 'ongoing' or start in self.revealed:
+            return 0
+        self.revealed.add(start)
+        if start in self.bombs:
+            self.state = 'defeat'
+            return 1
+        revealed, stack = 1, [start]
+        while stack:
+            cell = stack.pop()
+            if self.count(cell):
+                continue
+            for nxt in neighbor_indices(cell,self.dimensions):
+                if nxt not in self.revealed and nxt not in self.bombs:
+                    self.revealed.add(nxt)
+                    revealed += 1
+                    stack.append(nxt)
+        self.dug += revealed
+        if not self.remaining:
+            self.state = 'victory'
+        return revealed
+
+    def render(self,xray = False,window = None):
+        """
+        render_nd for the cells in window, a (start, stop) range per
+        axis (default the whole board); xray counts are not memoized
+        """
+        window = window or [(0,n) for n in self.dimensions]
+        def element(index):
+            if not xray and index not in self.revealed:
+                return '_'
+            if index in self.bombs:
+                return '.'
+            val = self.count(index,index in self.revealed)
+            return str(val) if val else ' '
+        def draw(axis,base):
+            lo, hi = window[axis]
+            step = self.strides[axis]
+            if axis == len(self.dimensions) - 1:
+                return [element(base + i * step) for i in range(lo,hi)]
+            return [draw(axis + 1,base + i * step) for i in range(lo,hi)]
+        return draw(0,0)
+
+
+# BINARY SNAPSHOTS
+# header: magic, version, number of dimensions, state, bits per square,
+# hidden safe squares left; then one u64 per dimension, the packed
+# squares, and the hidden mask (1 bit per square, first square in the
+# lowest bit)
+SNAPSHOT_MAGIC = b'MSNP'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sBBBBQ')
+STATES = ('ongoing','defeat','victory')
+
+def square_bits(ndim):
+    """
+    Bits per packed square: 4 while the counts fit below 15 (1 and 2
+    dimensions), else 8 or 16; the largest value marks a mine
+    """
+    most = 3 ** ndim - 1
+    return 4 if most < 15 else 8 if most < 255 else 16
+
+def pack_squares(values,bits):
+    mine = (1 << bits) - 1
+    top = max((val for val in values if val != '.'),default = 0)
+    if top >= mine:
+        raise ValueError(f'square count {top} does not fit in {bits} bits')
+    codes = [mine if val == '.' else val for val in values]
+    if bits == 4:
+        codes.append(0)
+        return bytes(codes[i] | codes[i + 1] << 4 for i in range(0,len(codes) - 1,2))
+    packed = array.array('B' if bits == 8 else 'H',codes)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def unpack_squares(data,bits,size):
+    mine = (1 << bits) - 1
+    if bits == 4:
+        codes = [code for byte in data for code in (byte & 15,byte >> 4)][:size]
+    else:
+        codes = array.array('B' if bits == 8 else 'H',bytes(data))
+        if sys.byteorder == 'big':
+            codes.byteswap()
+    return ['.' if code == mine else code for code in codes]
+
+def pack_flags(flags):
+    """Booleans -> bytes, flag i in bit i % 8 of byte i // 8"""
+    if numpy is not None:
+        return numpy.packbits(numpy.fromiter(flags,dtype = bool),bitorder = 'little').tobytes()
+    packed = bytearray()
+    for i,flag in enumerate(flags):
+        if not i & 7:
+            packed.append(0)
+        if flag:
+            packed[-1] |= 1 << (i & 7)
+    return bytes(packed)
+
+def unpack_flags(data,size):
+    if numpy is not None:
+        bits = numpy.unpackbits(numpy.frombuffer(data,dtype = numpy.uint8),count = size,bitorder = 'little')
+        return bits.astype(bool).tolist()
+    return [bool(data[i >> 3] >> (i & 7) & 1) for i in range(size)]
+
+def snapshot_bytes(game):
+    """A game dict (as new_game_nd makes) in the binary snapshot format"""
+    dim = tuple(game['dimensions'])
+    bits = square_bits(len(dim))
+    values = flatten(game['board'],len(dim))
+    hidden = flatten(game['hidden'],len(dim))
+    remaining = game['remaining'] if 'remaining' in game else hidden_safe(game)
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC,SNAPSHOT_VERSION,len(dim),
+        STATES.index(game['state']),bits,remaining)
+    return b''.join((header,struct.pack(f'<{len(dim)}Q',*dim),
+        pack_squares(values,bits),pack_flags(hidden)))
+
+def save_snapshot(game,path):
+    with open(path,'wb') as file:
+        file.write(snapshot_bytes(game))
+
+class Snapshot:
+    """
+    A saved game opened through mmap: only the header is read up front,
+    squares are decoded from the mapped pages when asked for
 
+    >>> import os, tempfile
+    >>> game = new_game_2d(2, 4, [(0, 0), (1, 0), (1, 1)])
+    >>> dig_2d(game, 0, 3)
+    4
+    >>> path = os.path.join(tempfile.mkdtemp(), 'game.msnp')
+    >>> save_snapshot(game, path)
+    >>> with Snapshot(path) as snap:
+    ...     print(snap.dimensions, snap.state, snap.value((1, 2)), snap.hidden((0, 0)))
+    ...     snap.to_game() == game
+    (2, 4) ongoing 1 True
+    True
+    """
+    def __init__(self,path):
+        self.file = open(path,'rb')
+        self.map = None
+        try:
+            self.open(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def open(self,path):
+        """Map the file and read the header, checking it is all there"""
+        length = os.fstat(self.file.fileno()).st_size
+        def need(end):
+            if length < end:
+                raise ValueError(f'truncated minesweeper snapshot ({length} of {end} bytes): {path}')
+        need(SNAPSHOT_HEADER.size)
+        self.map = mmap.mmap(self.file.fileno(),0,access=mmap.ACCESS_READ)
+        magic,version,ndim,state,bits,remaining = SNAPSHOT_HEADER.unpack_from(self.map,0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION \
+                or state >= len(STATES) or bits not in (4,8,16):
+            raise ValueError(f'not a version {SNAPSHOT_VERSION} minesweeper snapshot: {path}')
+        start = SNAPSHOT_HEADER.size
+        need(start + 8 * ndim)
+        self.dimensions = struct.unpack_from(f'<{ndim}Q',self.map,start)
+        self.state, self.bits, self.remaining = STATES[state], bits, remaining
+        self.strides = strides(self.dimensions)
+        self.size = self.strides[0] * self.dimensions[0] if ndim else 0
+        start += 8 * ndim
+        board_end = start + (self.size * bits + 7) // 8
+        need(board_end + (self.size + 7) // 8)
+        view = memoryview(self.map)
+        self.squares = view[start:board_end]
+        self.flags = view[board_end:board_end + (self.size + 7) // 8]
+        view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    def close(self):
+        for name in ('squares','flags'):
+            if hasattr(self,name):
+                getattr(self,name).release()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def index(self,coordinates):
+        return sum(c * s for c,s in zip(coordinates,self.strides))
+
+    def value(self,coordinates):
+        """Square as in the game dict: '.' or the neighbor count"""
+        index = self.index(coordinates)
+        if self.bits == 4:
+            code = self.squares[index >> 1] >> 4 * (index & 1) & 15
+        else:
+            width = self.bits // 8
+            code = int.from_bytes(self.squares[index * width:(index + 1) * width],'little')
+        return '.' if code == (1 << self.bits) - 1 else code
+
+    def hidden(self,coordinates):
+        index = self.index(coordinates)
+        return bool(self.flags[index >> 3] >> (index & 7) & 1)
+
+    def to_game(self):
+        """The whole game as a dict (as new_game_nd makes)"""
+        return {
+            'board': nest(unpack_squares(self.squares,self.bits,self.size),self.dimensions),
+            'dimensions': self.dimensions,
+            'hidden': nest(unpack_flags(self.flags,self.size),self.dimensions),
+            'remaining': self.remaining,
+            'state': self.state
+        }
 
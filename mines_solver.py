@@ -0,0 +1,373 @@
+"""
+Minesweeper player for mines.py games: looks only at what a player sees
+(the revealed numbers, and the total number of mines if given) and digs
+through mines.dig_nd, so it works on boards of any dimension
+
+Each turn it first makes the sure deductions (single-cell and subset
+rules); when there are none it splits the frontier into independent
+components, enumerates each one (memoized), and digs the cell least
+likely to be a mine.  Also a benchmark of win rate and speed:
+
+    python mines_solver.py --sizes 9x9:10 16x16:40 30x16:99 --games 200
+"""
+import argparse
+import collections
+import math
+import random
+import time
+
+import mines
+
+
+class TooManyConfigurations(Exception):
+    pass
+
+class Solver:
+    """
+    Plays one game.  Cells are linear indices (mines.strides order);
+    mines_total is the number of mines on the board, which makes the
+    probabilities exact (without it, cells away from the numbers get the
+    average frontier probability)
+
+    stats counts deduced cells, guesses, components enumerated and
+    enumeration results reused from memo
+    """
+    def __init__(self,game,mines_total = None,limit = 200_000):
+        self.game = game
+        self.dimensions = tuple(game['dimensions'])
+        self.strides = mines.strides(self.dimensions)
+        self.size = self.strides[0] * self.dimensions[0]
+        self.total, self.limit = mines_total, limit
+        self.flagged = set()
+        self.memo = {}
+        self.stats = {'deduced': 0, 'guesses': 0, 'components': 0, 'memo_hits': 0}
+
+    def neighbors(self,index):
+        return mines.neighbor_indices(index,self.dimensions)
+
+    def coord(self,index):
+        return tuple(index // s % n for s,n in zip(self.strides,self.dimensions))
+
+    def constraints(self):
+        """
+        (hidden cells, mines among them) for every revealed number next to
+        a hidden cell that is not flagged, and the set of unknown cells
+        """
+        depth = len(self.dimensions)
+        hidden = mines.flatten(self.game['hidden'],depth)
+        values = mines.flatten(self.game['board'],depth)
+        unknown = {i for i,hid in enumerate(hidden) if hid} - self.flagged
+        found = set()
+        for i,hid in enumerate(hidden):
+            if hid or not values[i]:
+                continue
+            around = self.neighbors(i)
+            cells = frozenset(j for j in around if j in unknown)
+            if cells:
+                found.add((cells,values[i] - sum(j in self.flagged for j in around)))
+        return found, unknown
+
+    def deduce(self,constraints):
+        """
+        Single-cell rule (a number already satisfied, or needing all its
+        cells) and subset rule (A inside B: B - A holds count B - count A),
+        repeated until nothing changes
+        Returns (safe cells, mine cells, remaining constraints)
+        """
+        safe, found = set(), set()
+        constraints = set(constraints)
+        while True:
+            reduced = set()
+            for cells,count in constraints:
+                rest = cells - safe - found
+                if rest:
+                    reduced.add((rest,count - len(cells & found)))
+            constraints, known = reduced, len(safe) + len(found)
+            for cells,count in constraints:
+                if count == 0:
+                    safe |= cells
+                elif count == len(cells):
+                    found |= cells
+            if len(safe) + len(found) > known:
+                continue
+            by_cell = collections.defaultdict(list)
+            for con in constraints:
+                for cell in con[0]:
+                    by_cell[cell].append(con)
+            derived = set()
+            for small,small_count in constraints:
+                for big,big_count in by_cell[next(iter(small))]:
+                    if len(big) <= len(small) or not small <= big:
+                        continue
+                    rest, count = big - small, big_count - small_count
+                    if count == 0:
+                        safe |= rest
+                    elif count == len(rest):
+                        found |= rest
+                    else:
+                        derived.add((rest,count))
+            derived -= constraints
+            if len(safe) + len(found) == known and not derived:
+                return safe, found, constraints
+            constraints |= derived
+
+    def components(self,constraints):
+        """Group constraints that share cells (union-find over cells)"""
+        parent = {}
+        def root(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+        for cells,_ in constraints:
+            first = None
+            for cell in cells:
+                parent.setdefault(cell,cell)
+                if first is None:
+                    first = root(cell)
+                else:
+                    parent[root(cell)] = first
+        groups = collections.defaultdict(list)
+        for con in constraints:
+            groups[root(next(iter(con[0])))].append(con)
+        return list(groups.values())
+
+    def enumerate(self,component):
+        """
+        All mine layouts of one component, by backtracking cell by cell
+        (cells in breadth-first order so constraints close early) on an
+        explicit stack, so long chains of cells don't hit the recursion
+        limit
+        Returns (cells, {mines: layouts}, {mines: per-cell mine counts}),
+        memoized on the component's constraints
+        """
+        key = frozenset(component)
+        if key in self.memo:
+            self.stats['memo_hits'] += 1
+            return self.memo[key]
+        self.stats['components'] += 1
+        by_cell = collections.defaultdict(list)
+        for j,(cells,_) in enumerate(component):
+            for cell in cells:
+                by_cell[cell].append(j)
+        order, seen = [], set()
+        for start in sorted(by_cell):
+            if start in seen:
+                continue
+            seen.add(start)
+            queue = collections.deque([start])
+            while queue:
+                cell = queue.popleft()
+                order.append(cell)
+                for j in by_cell[cell]:
+                    for nxt in sorted(component[j][0]):
+                        if nxt not in seen:
+                            seen.add(nxt)
+                            queue.append(nxt)
+        need = [count for _,count in component]
+        left = [len(cells) for cells,_ in component]
+        touches = [by_cell[cell] for cell in order]
+        layouts, per_cell = collections.Counter(), {}
+        # depth-first with an explicit stack: chosen[i] is the value tried
+        # at cell i (-1 before the first), undone before the next one
+        chosen, i, placed, nodes = [-1] * len(order), 0, 0, 1
+        while i >= 0:
+            if i == len(order):
+                layouts[placed] += 1
+                counts = per_cell.setdefault(placed,[0] * len(order))
+                for k,val in enumerate(chosen):
+                    counts[k] += val
+                i -= 1
+                continue
+            val = chosen[i]
+            if val >= 0:
+                placed -= val
+                for j in touches[i]:
+                    need[j] += val
+                    left[j] += 1
+            if val == 1:
+                chosen[i] = -1
+                i -= 1
+                continue
+            val = chosen[i] = val + 1
+            placed += val
+            ok = True
+            for j in touches[i]:
+                need[j] -= val
+                left[j] -= 1
+                ok = ok and 0 <= need[j] <= left[j]
+            if ok:
+                i += 1
+                nodes += 1
+                if nodes > self.limit:
+                    raise TooManyConfigurations
+        self.memo[key] = result = (order,dict(layouts),per_cell)
+        return result
+
+    def probabilities(self,constraints,unknown):
+        """Chance that each unknown cell is a mine, {cell: probability}"""
+        parts = []
+        for component in self.components(constraints):
+            try:
+                parts.append(self.enumerate(component))
+            except TooManyConfigurations:
+                # too big to enumerate: local estimate from its numbers,
+                # standing in as one layout with the estimated mine count
+                guess = collections.defaultdict(float)
+                for cells,count in component:
+                    for cell in cells:
+                        guess[cell] = max(guess[cell],count / len(cells))
+                estimate = round(sum(guess.values()))
+                parts.append((list(guess),{estimate: 1},{estimate: list(guess.values())}))
+        frontier = {cell for cells,_ in constraints for cell in cells}
+        interior = [cell for cell in unknown if cell not in frontier]
+        if self.total is not None:
+            exact = self.exact(parts,len(interior),self.total - len(self.flagged))
+            if exact is not None:
+                probs, inside = exact
+                probs.update(dict.fromkeys(interior,inside))
+                return probs
+        probs = {}
+        for cells,layouts,per_cell in parts:
+            total = sum(layouts.values())
+            for k,cell in enumerate(cells):
+                probs[cell] = sum(counts[k] for counts in per_cell.values()) / total
+        inside = sum(probs.values()) / len(probs) if probs else 0.5
+        probs.update(dict.fromkeys(interior,inside))
+        return probs
+
+    @staticmethod
+    def exact(parts,interior,left):
+        """
+        Weigh each component's layouts by the ways to put the mines left
+        over in the interior cells: math.comb(interior, left - frontier
+        mines), with exact integers
+        Returns ({frontier cell: probability}, interior probability), or
+        None if no layout fits the mine total
+        """
+        def convolve(a,b):
+            out = collections.Counter()
+            for i,x in a.items():
+                for j,y in b.items():
+                    out[i + j] += x * y
+            return out
+        def weight(t):
+            return math.comb(interior,left - t) if 0 <= left - t <= interior else 0
+        full = {0: 1}
+        for _,layouts,_ in parts:
+            full = convolve(full,layouts)
+        total = sum(n * weight(t) for t,n in full.items())
+        if not total:
+            return None
+        probs = {}
+        for i,(cells,layouts,per_cell) in enumerate(parts):
+            others = {0: 1}
+            for j,(_,other,_) in enumerate(parts):
+                if j != i:
+                    others = convolve(others,other)
+            weights = {k: sum(n * weight(t + k) for t,n in others.items()) for k in layouts}
+            for idx,cell in enumerate(cells):
+                probs[cell] = sum(per_cell[k][idx] * weights[k] for k in layouts) / total
+        inside = sum(n * weight(t) * (left - t) for t,n in full.items()) / total / interior \
+            if interior else 0.0
+        return probs, inside
+
+    def move(self):
+        """Cells to dig next: every sure-safe cell, else the safest guess"""
+        constraints, unknown = self.constraints()
+        safe, found, constraints = self.deduce(constraints)
+        self.flagged |= found
+        self.stats['deduced'] += len(safe) + len(found)
+        if safe:
+            return sorted(safe)
+        unknown -= found
+        if not unknown:
+            return []
+        self.stats['guesses'] += 1
+        probs = self.probabilities(constraints,unknown)
+        return [min(unknown,key = lambda cell: (probs[cell],len(self.neighbors(cell)),cell))]
+
+    def play(self,first = None):
+        """
+        Dig until the game ends (first: where to start, default the
+        middle cell).  Returns whether it was won
+        """
+        if first is None:
+            first = tuple(n // 2 for n in self.dimensions)
+        mines.dig_nd(self.game,first)
+        while self.game['state'] == 'ongoing':
+            cells = self.move()
+            if not cells:
+                break
+            for cell in cells:
+                mines.dig_nd(self.game,self.coord(cell))
+                if self.game['state'] != 'ongoing':
+                    break
+        return self.game['state'] == 'victory'
+
+def random_game(dimensions,count,rng,first = None):
+    """
+    New game with count mines placed at random, none on or next to
+    first (default the middle cell), so the first dig opens an area
+    """
+    first = first or tuple(n // 2 for n in dimensions)
+    keep = {first} | {tuple(c + d for c,d in zip(first,delta))
+        for delta in mines.neighbor_deltas(mines.edge_key(first,dimensions))}
+    size = math.prod(dimensions)
+    steps = mines.strides(tuple(dimensions))
+    free = [i for i in range(size)
+        if tuple(i // s % n for s,n in zip(steps,dimensions)) not in keep]
+    bombs = [tuple(i // s % n for s,n in zip(steps,dimensions))
+        for i in rng.sample(free,min(count,len(free)))]
+    return mines.new_game_nd(tuple(dimensions),bombs)
+
+def benchmark(sizes,games = 100,seed = 0):
+    """
+    Play games on each (dimensions, mines) size
+    Returns one dict per size: wins, win rate, games per second and
+    guesses per game
+    """
+    rows = []
+    for dimensions,count in sizes:
+        rng = random.Random(seed)
+        wins = guesses = 0
+        start = time.perf_counter()
+        for _ in range(games):
+            game = random_game(dimensions,count,rng)
+            solver = Solver(game,count)
+            wins += solver.play()
+            guesses += solver.stats['guesses']
+        seconds = time.perf_counter() - start
+        rows.append({
+            'dimensions': 'x'.join(map(str,dimensions)),
+            'mines': count,
+            'games': games,
+            'wins': wins,
+            'win_rate': wins / games if games else 0.0,
+            'games_per_second': games / seconds if seconds else 0.0,
+            'guesses_per_game': guesses / games if games else 0.0,
+        })
+    return rows
+
+def parse_size(text):
+    """'16x16:40' -> ((16, 16), 40)"""
+    dims, _, count = text.partition(':')
+    return tuple(int(n) for n in dims.split('x')), int(count)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Minesweeper solver benchmark')
+    parser.add_argument('--sizes',nargs = '+',type = parse_size,
+        default = [((9,9),10),((16,16),40),((30,16),99),((6,6,6),20)],
+        help = "board sizes as DIMSxDIMS:MINES, e.g. 16x16:40 or 5x5x5:15")
+    parser.add_argument('-n','--games',type = int,default = 100)
+    parser.add_argument('--seed',type = int,default = 0)
+    args = parser.parse_args(argv)
+    rows = benchmark(args.sizes,args.games,args.seed)
+    for row in rows:
+        print(f"{row['dimensions']:>10} {row['mines']:>4} mines: won {row['wins']}/{row['games']}"
+            f" ({row['win_rate']:.1%}), {row['games_per_second']:.1f} games/s,"
+            f" {row['guesses_per_game']:.2f} guesses/game")
+    return rows
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,10 @@
+import array
+import collections
+import heapq
+import itertools
+import mmap
+import random
+
 direction_vector = {
     "up": (-1, 0),
     "down": (+1, 0),
@@ -67,32 +74,117 @@ def add_rem(sect,rem,add):
     section.add(add)
     return section
 
+class Engine:
+    """
+    Game that changes in place, for replaying solutions and driving a
+    GUI: step moves the player and pushed computer inside self.game's
+    own sets and logs one byte (direction index, plus 4 for a push),
+    so a move costs O(1) however many computers there are
+    undo/redo walk the log back and forth; a new step drops the redo log
+    """
+    names = list(direction_vector)
+    vectors = list(direction_vector.values())
+    index = {name: d for d,name in enumerate(names)}
+
+    def __init__(self,game,copy = True):
+        if copy:
+            game = dict(game,player = set(game["player"]),computer = set(game["computer"]))
+        self.game = game
+        (self.player,) = game["player"]
+        self.placed = len(game["computer"] & game["target"])
+        self.log, self.redo_log = bytearray(), bytearray()
+
+    def move_player(self,cell):
+        self.game["player"].remove(self.player)
+        self.game["player"].add(cell)
+        self.player = cell
+
+    def move_computer(self,cell,new):
+        computers, targets = self.game["computer"], self.game["target"]
+        computers.remove(cell)
+        computers.add(new)
+        self.placed += (new in targets) - (cell in targets)
+
+    def apply(self,code):
+        """Redo a logged move (no checks)"""
+        add = self.vectors[code & 3]
+        new = change(self.player,add)
+        if code & 4:
+            self.move_computer(new,change(new,add))
+        self.move_player(new)
+        self.log.append(code)
+
+    def step(self,direction):
+        """
+        Two possible ways a player can move:
+        1) The movement is to an empty space
+        An empty space is defined as not having a computer or wall
+        2) The movement pushes a computer into an empty space
+        Returns whether the player moved
+        """
+        d = self.index[direction]
+        walls, computers = self.game["wall"], self.game["computer"]
+        # New is the coordinate that the player wants to move to
+        new = change(self.player,self.vectors[d])
+        if new in walls:
+            return False
+        if new in computers:
+            # Extra is the coordinate want to move computer to
+            extra = change(new,self.vectors[d])
+            if extra in walls or extra in computers:
+                return False
+            d |= 4
+        self.apply(d)
+        self.redo_log.clear()
+        return True
+
+    def undo(self):
+        """Take back the last move; returns False if there is none"""
+        if not self.log:
+            return False
+        code = self.log.pop()
+        back = self.vectors[code & 3]
+        back = (-back[0],-back[1])
+        cell = self.player
+        self.move_player(change(cell,back))
+        if code & 4:
+            self.move_computer(change(cell,self.vectors[code & 3]),cell)
+        self.redo_log.append(code)
+        return True
+
+    def redo(self):
+        """Repeat the last undone move; returns False if there is none"""
+        if not self.redo_log:
+            return False
+        self.apply(self.redo_log.pop())
+        return True
+
+    def replay(self,moves):
+        """Apply a sequence of directions; returns whether it ends solved"""
+        for direction in moves:
+            self.step(direction)
+        return self.victory()
+
+    def moves(self):
+        """Directions of the moves made so far (after undos)"""
+        return [self.names[code & 3] for code in self.log]
+
+    def victory(self):
+        """victory_check in O(1), from the count of computers on targets"""
+        return bool(self.game["computer"]) and \
+            self.placed == len(self.game["computer"]) == len(self.game["target"])
+
+    def dump(self):
+        return dump_game(self.game)
+
 def step_game(game, direction):
     """
-    Two possible ways a player can move:
-    1) The movement is to an empty space
-    An empty space is defined as not having a computer or wall
-    2) The movement pushes a computer into an empty space
-    """
-    wall_comp = lambda x: x in revised["wall"] or x in revised["computer"]
-    computer = lambda x: x in revised["computer"]
-    revised = game.copy()
-    # Find the coordinate of the player
-    (coord,) = revised["player"]
-    add = direction_vector[direction]
-    # New is the coordinate that the player wants to move to
-    new = change(coord,add)
-    # If New is empty space
-    if not wall_comp(new) and not computer(new):
-        revised["player"] = add_rem(game["player"],coord,new)
-    elif computer(new):
-        # Extra is the coordinate want to move computer to
-        extra = change(new,add)
-        # As long as extra is an empty space
-        if not wall_comp(extra):
-            revised["computer"] = add_rem(game["computer"],new,extra)
-            revised["player"] = add_rem(game["player"],coord,new)
-    return revised
+    Copying wrapper around Engine.step: the given game is unchanged and
+    the moved game is returned
+    """
+    engine = Engine(game)
+    engine.step(direction)
+    return engine.game
 
 def dump_game(game):
     """
@@ -117,86 +209,856 @@ def dump_game(game):
             representation[row][col].append(key)
     return representation
 
-def neighbors(node,wall):
-    neighbor = []
-    info = {"player": {node[0]}, "computer": node[1], "wall": wall}
-    for direction in direction_vector:
-        neighbor.append(make_hash(step_game(info,direction),direction))
-    return neighbor
+class Level:
+    """
+    Static, packed view of a game for the solvers: cells are numbered
+    row * cols + col, boxes are a bitmask int (bit i = box on cell i)
+    and a search state is the single int boxes * size + player
+
+    The deadlock tables (dead squares, wall-line segments) are built
+    once here; stats counts the pushes each deadlock rule pruned and
+    the states expanded
+    """
+    max_bounds = 50_000
+
+    def __init__(self,game):
+        rows, cols = game["x"]
+        self.cols, self.size = cols, rows * cols
+        self.walls = bytearray(self.size)
+        for row,col in game["wall"]:
+            self.walls[self.index((row,col))] = 1
+        # step[cell][d]: the cell one step in direction d, or -1 if a wall
+        self.step = [[-1] * len(direction_vector) for _ in range(self.size)]
+        for cell in range(self.size):
+            if self.walls[cell]:
+                continue
+            for d,diff in enumerate(direction_vector.values()):
+                row, col = change(divmod(cell,cols),diff)
+                if 0 <= row < rows and 0 <= col < cols and not self.walls[row * cols + col]:
+                    self.step[cell][d] = row * cols + col
+        self.targets = self.mask(game["target"])
+        self.balanced = len(game["computer"]) == len(game["target"])
+        self.distances = self.push_distances()
+        self.dead = self.dead_squares()
+        self.segments, self.cell_segments = self.wall_lines()
+        self.bounds = collections.OrderedDict()
+        self.stats = {"dead_square": 0, "wall_line": 0, "freeze": 0, "expanded": 0}
+
+    def index(self,coord):
+        return coord[0] * self.cols + coord[1]
+
+    def mask(self,coords):
+        mask = 0
+        for coord in coords:
+            mask |= 1 << self.index(coord)
+        return mask
+
+    def pack(self,game):
+        (player,) = game["player"]
+        return self.mask(game["computer"]) * self.size + self.index(player)
+
+    def dead_squares(self):
+        """
+        Cells (as a bytearray flag) from which a box can reach no target
+        even with every other box gone: the cells no reverse pull from a
+        target gets to (this covers corners and dead wall edges)
+        """
+        dead = bytearray(self.size)
+        for cell in range(self.size):
+            if not self.walls[cell] and all(dist[cell] == INF for dist in self.distances):
+                dead[cell] = 1
+        return dead
 
-def make_hash(game,direction = None):
-    (player,) = game["player"]
-    computers = game["computer"]
-    return (player,computers,direction)
+    def wall_lines(self):
+        """
+        Runs of cells along a wall, closed by walls at both ends: a box
+        pushed into one can only move along it, so a run holding more
+        boxes than targets is a deadlock
+        Returns [(cells mask, targets in run)] and, per cell, the runs
+        it belongs to
+        """
+        segments, cell_segments = [], [[] for _ in range(self.size)]
+        # (direction along the run, sides that may be the wall)
+        for along,sides in ((3,(0,1)),(1,(2,3))):
+            for side in sides:
+                for cell in range(self.size):
+                    if self.walls[cell] or self.step[cell][along ^ 1] >= 0:
+                        continue
+                    run = [cell]
+                    while self.step[run[-1]][along] >= 0:
+                        run.append(self.step[run[-1]][along])
+                    if all(self.step[c][side] < 0 for c in run) and len(run) > 1:
+                        mask = sum(1 << c for c in run)
+                        for c in run:
+                            cell_segments[c].append(len(segments))
+                        segments.append((mask,(mask & self.targets).bit_count()))
+        return segments, cell_segments
 
-def seen_hash(made):
-    return made[0] + (frozenset(made[1]),) + (made[2],)
+    def frozen(self,boxes,cell,fixed,chain):
+        """
+        True if the box on cell can never move again, with the boxes in
+        fixed treated as walls: blocked both vertically and horizontally
+        by walls, by dead squares on both sides, or by frozen boxes.
+        Boxes found frozen are added to chain
+        """
+        step, dead = self.step, self.dead
+        fixed = fixed | {cell}
+        for axis in (0,2):
+            a, b = step[cell][axis], step[cell][axis + 1]
+            blocked = a < 0 or b < 0 or a in fixed or b in fixed or (dead[a] and dead[b])
+            for nxt in (a,b):
+                if not blocked and boxes >> nxt & 1:
+                    blocked = self.frozen(boxes,nxt,fixed,chain)
+            if not blocked:
+                return False
+        chain.add(cell)
+        return True
+
+    def push_ok(self,boxes,beyond):
+        """
+        Deadlock checks for a box just pushed onto beyond (boxes is the
+        layout after the push): dead square, overfull wall line, freeze
+
+        Each rule has to be sound: it may only reject layouts that can
+        never be solved
+
+        >>> pieces = {"#": ["wall"], "$": ["computer"], ".": ["target"], "@": ["player"], " ": []}
+        >>> rows = ["########",
+        ...         "#..    #",
+        ...         "#      #",
+        ...         "# $$$$ #",
+        ...         "#  @  .#",
+        ...         "#.     #",
+        ...         "########"]
+        >>> level = Level(new_game([[list(pieces[ch]) for ch in row] for row in rows]))
+        >>> def check(boxes,beyond):
+        ...     level.stats = dict.fromkeys(level.stats,0)
+        ...     ok = level.push_ok(level.mask(boxes),level.index(beyond))
+        ...     return ok, [rule for rule,n in level.stats.items() if n]
+
+        Pruned: a corner with no target, a third box on the top wall
+        (two targets there), a 2x2 block off the targets
+
+        >>> check([(1, 6)],(1, 6))
+        (False, ['dead_square'])
+        >>> check([(1, 3), (1, 4), (1, 5)],(1, 5))
+        (False, ['wall_line'])
+        >>> check([(2, 3), (2, 4), (3, 3), (3, 4)],(3, 4))
+        (False, ['freeze'])
+
+        Kept: two boxes on the top wall that can still slide along it,
+        boxes frozen against the wall but all on targets, a box next to
+        a block that can still move
+
+        >>> check([(1, 3), (1, 5)],(1, 5))
+        (True, [])
+        >>> check([(1, 1), (1, 2)],(1, 2))
+        (True, [])
+        >>> check([(2, 3), (2, 4), (3, 3), (3, 5)],(3, 5))
+        (True, [])
+        """
+        if self.dead[beyond]:
+            self.stats["dead_square"] += 1
+            return False
+        for seg in self.cell_segments[beyond]:
+            mask, targets = self.segments[seg]
+            if (boxes & mask).bit_count() > targets:
+                self.stats["wall_line"] += 1
+                return False
+        chain = set()
+        if self.frozen(boxes,beyond,frozenset(),chain) and \
+                any(not self.targets >> box & 1 for box in chain):
+            self.stats["freeze"] += 1
+            return False
+        return True
+
+    def successors(self,state):
+        """(direction index, next state) for every legal, non-dead move"""
+        boxes, player = divmod(state,self.size)
+        step, size = self.step, self.size
+        self.stats["expanded"] += 1
+        for d,nxt in enumerate(step[player]):
+            if nxt < 0:
+                continue
+            if boxes >> nxt & 1:
+                beyond = step[nxt][d]
+                if beyond < 0 or boxes >> beyond & 1:
+                    continue
+                new_boxes = boxes ^ (1 << nxt) ^ (1 << beyond)
+                if self.push_ok(new_boxes,beyond):
+                    yield d, new_boxes * size + nxt
+            else:
+                yield d, boxes * size + nxt
+
+    def solved(self,state):
+        return state // self.size == self.targets
+
+    def zobrist(self,state,seed = 0):
+        """
+        64-bit Zobrist key of a state: the xor of one random word per box
+        cell and one for the player cell (tables made on first use)
+        """
+        if not hasattr(self,"box_keys"):
+            rand = random.Random(seed)
+            self.box_keys = [rand.getrandbits(64) for _ in range(self.size)]
+            self.player_keys = [rand.getrandbits(64) for _ in range(self.size)]
+        boxes, player = divmod(state,self.size)
+        key = self.player_keys[player]
+        while boxes:
+            low = boxes & -boxes
+            key ^= self.box_keys[low.bit_length() - 1]
+            boxes ^= low
+        return key
+
+    def zobrist_step(self,key,state,nxt):
+        """
+        Key of nxt from the key of state, when nxt is one move or push
+        away: only the player cell and at most two box cells change
+        """
+        boxes, player = divmod(state,self.size)
+        new_boxes, new_player = divmod(nxt,self.size)
+        key ^= self.player_keys[player] ^ self.player_keys[new_player]
+        moved = boxes ^ new_boxes
+        while moved:
+            low = moved & -moved
+            key ^= self.box_keys[low.bit_length() - 1]
+            moved ^= low
+        return key
 
-def test(touching,coord,target):
+    def walk(self,boxes,player):
+        """
+        BFS over the cells the player can reach without pushing
+        Returns {cell: (previous cell, direction index, steps)}
+        """
+        tree, queue, step = {player: (None,None,0)}, collections.deque([player]), self.step
+        while queue:
+            cell = queue.popleft()
+            steps = tree[cell][2] + 1
+            for d,nxt in enumerate(step[cell]):
+                if nxt >= 0 and nxt not in tree and not boxes >> nxt & 1:
+                    tree[nxt] = (cell,d,steps)
+                    queue.append(nxt)
+        return tree
+
+    def region(self,boxes,player):
+        """Cells the player can reach without pushing (flood fill)"""
+        seen, stack, step = {player}, [player], self.step
+        while stack:
+            for nxt in step[stack.pop()]:
+                if nxt >= 0 and nxt not in seen and not boxes >> nxt & 1:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def normalize(self,state):
+        """
+        The same boxes with the player moved to the smallest cell of its
+        reachable region: every state the player can walk between maps
+        to one key
+        """
+        boxes, player = divmod(state,self.size)
+        return boxes * self.size + min(self.region(boxes,player))
+
+    def pushes_from(self,boxes,cells):
+        """(cell, direction index, new boxes, new player) for pushes from cells"""
+        step = self.step
+        self.stats["expanded"] += 1
+        for cell in cells:
+            for d,nxt in enumerate(step[cell]):
+                if nxt < 0 or not boxes >> nxt & 1:
+                    continue
+                beyond = step[nxt][d]
+                if beyond < 0 or boxes >> beyond & 1:
+                    continue
+                new_boxes = boxes ^ (1 << nxt) ^ (1 << beyond)
+                if self.push_ok(new_boxes,beyond):
+                    yield cell, d, new_boxes, nxt
+
+    def pushes(self,state):
+        """
+        (direction index, next state, walk steps) for every push the
+        player can reach: walk to the cell behind a box, then push it
+        """
+        boxes, player = divmod(state,self.size)
+        tree = self.walk(boxes,player)
+        for cell,d,new_boxes,nxt in self.pushes_from(boxes,tree):
+            yield d, new_boxes * self.size + nxt, tree[cell][2]
+
+    def walk_path(self,boxes,start,goal):
+        """Directions for the shortest walk from start to goal"""
+        tree, moves = self.walk(boxes,start), []
+        while goal != start:
+            goal, d, _ = tree[goal]
+            moves.append(directions[d])
+        return moves[::-1]
+
+    def push_distances(self):
+        """
+        For each target, the fewest pushes that bring a box from each
+        cell onto it, ignoring the other boxes (BFS of reverse pulls:
+        a box moves from cell to cell + d only if cell - d is free)
+        """
+        distances = []
+        for target in range(self.size):
+            if not self.targets >> target & 1:
+                continue
+            dist, queue = [INF] * self.size, collections.deque([target])
+            dist[target] = 0
+            while queue:
+                cell = queue.popleft()
+                for d,prev in enumerate(self.step[cell]):
+                    # pulling the box from cell back to prev = step[cell][d]
+                    # needs the player to stand one further on
+                    if prev < 0 or dist[prev] != INF or self.step[prev][d] < 0:
+                        continue
+                    dist[prev] = dist[cell] + 1
+                    queue.append(prev)
+            distances.append(dist)
+        return distances
+
+    def lower_bound(self,boxes):
+        """
+        Pushes still needed at least: a minimum-cost matching of boxes to
+        targets by push distance (INF if some box can reach no target)
+        Cached per box layout, least recently used layouts dropped past
+        max_bounds entries
+        """
+        bounds = self.bounds
+        if boxes in bounds:
+            bounds.move_to_end(boxes)
+            return bounds[boxes]
+        cells = [cell for cell in range(self.size) if boxes >> cell & 1]
+        cost = [[dist[cell] for dist in self.distances] for cell in cells]
+        bound = min_cost_matching(cost) if self.balanced else INF
+        bounds[boxes] = bound
+        if len(bounds) > self.max_bounds:
+            bounds.popitem(last = False)
+        return bound
+
+    def walk_bound(self,state):
+        """Moves the player needs at least before the next useful push"""
+        boxes, player = divmod(state,self.size)
+        row, col = divmod(player,self.cols)
+        loose = boxes & ~self.targets
+        best = 0 if not loose else INF
+        while loose:
+            cell = (loose & -loose).bit_length() - 1
+            loose &= loose - 1
+            r, c = divmod(cell,self.cols)
+            best = min(best,abs(r - row) + abs(c - col) - 1)
+        return best
+
+directions = list(direction_vector)
+INF = float("inf")
+
+class TranspositionTable:
     """
-    The testing part of the terminate function
+    Fixed-size open-addressing table of 64-bit Zobrist key -> cost, kept
+    in flat arrays sized from a memory budget in bytes (14 bytes a slot:
+    key, cost and a 16-bit generation stamp), so it never grows however
+    long the search runs
+
+    A key probes up to probes slots; when all are taken by other keys the
+    first one is overwritten.  With a spill path, the overwritten entry
+    is moved to a second, larger table in a memory-mapped file instead
+    of being lost, and lookups that miss in memory check it too
+
+    clear() starts a new generation: a slot only counts as taken if its
+    stamp is the current one, so nothing is zeroed or reallocated (the
+    arrays are only wiped when the stamp wraps, every 65535 clears)
+
+    stats counts lookups, hits, disk hits, stores, collisions (probes
+    past a taken slot), evictions, spills and disk overwrites;
+    report() adds the occupancy of both tables
     """
-    set1 = {(-1,0),(+1,0)}
-    set2 = {(0,-1),(0,+1)}
-    if len(touching) == 2 and not touching ^ set1 or not touching ^ set2:
-        return True 
-    elif len(touching) > 2 and coord not in target: 
-        return True
-    return False 
-
-def terminate(neighbor,wall,target):
-    """
-    Looks thru all the coordinates adjacent to
-    one of the computer sides
-    If a computer is in a corner of a wall,
-    This pathway will never solve the game, so
-    it will return True (meaning it should terminate)
-    """
-    for coord in neighbor[1]: 
-        adj = adjacent(coord)
-        touching = {th for th in adj if th in wall}
-        if test(touching,coord,target):
-            return True
-    return False 
-
-def adjacent(coord):
-    adjac = []
-    add = list(direction_vector.values())
-    for direction in add: 
-        adjac.append(change(coord,direction))
-    return adjac
-
-def path(current):
-    list1 = []
-    for i in range(1, len(current)):
-        list1.append(current[i][2])
-    return list1
-
-def solve_puzzle(game):
-    """
-    BFS
-    Also checks if already solved at beginning
+    probes = 8
+
+    def __init__(self,memory = 64 << 20,spill = None,spill_memory = None):
+        self.slots = self.fit(memory)
+        self.keys = array.array("Q",bytes(8 * self.slots))
+        self.costs = array.array("I",bytes(4 * self.slots))
+        self.stamps = array.array("H",bytes(2 * self.slots))
+        self.stamp = 1
+        self.entries = self.disk_entries = 0
+        self.disk = self.file = None
+        if spill is not None:
+            slots = self.disk_slots = self.fit(spill_memory or 8 * memory)
+            self.file = open(spill,"w+b")
+            self.file.truncate(14 * slots)
+            self.disk = mmap.mmap(self.file.fileno(),14 * slots)
+            view = memoryview(self.disk)
+            self.disk_keys = view[:8 * slots].cast("Q")
+            self.disk_costs = view[8 * slots:12 * slots].cast("I")
+            self.disk_stamps = view[12 * slots:].cast("H")
+        self.stats = {"lookups": 0, "hits": 0, "disk_hits": 0, "stores": 0,
+            "collisions": 0, "evictions": 0, "spills": 0, "disk_overwrites": 0}
+
+    @staticmethod
+    def fit(memory):
+        """Largest power-of-two slot count within memory bytes (at least 16)"""
+        slots = 16
+        while 28 * slots <= memory:
+            slots *= 2
+        return slots
+
+    def close(self):
+        if self.disk is not None:
+            self.disk_keys.release()
+            self.disk_costs.release()
+            self.disk_stamps.release()
+            self.disk.close()
+            self.file.close()
+            self.disk = self.file = None
+
+    def clear(self):
+        """Forget every entry (a new generation; O(1) but every 65535th call)"""
+        self.entries = self.disk_entries = 0
+        self.stamp += 1
+        if self.stamp <= 0xFFFF:
+            return
+        self.stamp = 1
+        self.stamps = array.array("H",bytes(2 * self.slots))
+        if self.disk is not None:
+            chunk = bytes(1 << 20)
+            stamps = self.disk_stamps.cast("B")
+            for start in range(0,len(stamps),len(chunk)):
+                end = min(start + len(chunk),len(stamps))
+                stamps[start:end] = chunk[:end - start]
+            stamps.release()
+
+    def lookup(self,key):
+        """Stored cost for key, or None"""
+        self.stats["lookups"] += 1
+        cost = self.find(self.keys,self.costs,self.stamps,self.slots - 1,key)
+        if cost is not None:
+            self.stats["hits"] += 1
+            return cost
+        if self.disk is not None:
+            cost = self.find(self.disk_keys,self.disk_costs,self.disk_stamps,self.disk_slots - 1,key)
+            if cost is not None:
+                self.stats["disk_hits"] += 1
+        return cost
+
+    def find(self,keys,costs,stamps,mask,key):
+        stamp = self.stamp
+        for i in range(self.probes):
+            slot = (key + i) & mask
+            if stamps[slot] != stamp:
+                return None
+            if keys[slot] == key:
+                return costs[slot]
+        return None
+
+    def store(self,key,cost):
+        self.stats["stores"] += 1
+        keys, costs, stamps, mask = self.keys, self.costs, self.stamps, self.slots - 1
+        stamp = self.stamp
+        for i in range(self.probes):
+            slot = (key + i) & mask
+            if stamps[slot] != stamp:
+                self.entries += 1
+                keys[slot], costs[slot], stamps[slot] = key, cost, stamp
+                return
+            if keys[slot] == key:
+                costs[slot] = cost
+                return
+            self.stats["collisions"] += 1
+        slot = key & mask
+        self.stats["evictions"] += 1
+        if self.disk is not None:
+            self.spill(keys[slot],costs[slot])
+        keys[slot], costs[slot] = key, cost
+
+    def spill(self,key,cost):
+        self.stats["spills"] += 1
+        keys, costs, stamps, mask = self.disk_keys, self.disk_costs, self.disk_stamps, self.disk_slots - 1
+        stamp = self.stamp
+        for i in range(self.probes):
+            slot = (key + i) & mask
+            if stamps[slot] != stamp:
+                self.disk_entries += 1
+                keys[slot], costs[slot], stamps[slot] = key, cost, stamp
+                return
+            if keys[slot] == key:
+                costs[slot] = cost
+                return
+        self.stats["disk_overwrites"] += 1
+        keys[key & mask], costs[key & mask] = key, cost
+
+    def report(self):
+        report = dict(self.stats, slots = self.slots, entries = self.entries,
+            occupancy = self.entries / self.slots)
+        if self.disk is not None:
+            report.update(disk_slots = self.disk_slots, disk_entries = self.disk_entries,
+                disk_occupancy = self.disk_entries / self.disk_slots)
+        return report
+
+def min_cost_matching(cost):
     """
-    solved = lambda comp: not comp ^ target
-    target = game["target"]
-    wall = game["wall"]
-    transform = make_hash(game)
-    if solved(transform[1]):
-        return []
-    queue = [(transform,)]
-    seen = {seen_hash(transform)}
-    while queue: 
-        look_at = queue.pop(0)
-        for neighbor in neighbors(look_at[-1],wall):
-            if seen_hash(neighbor) in seen:
+    Hungarian algorithm: least total cost of assigning each row of the
+    cost matrix to a distinct column (len(cost) <= len(cost[0]))
+    INF entries are forbidden; returns INF if no assignment exists
+    """
+    n = len(cost)
+    if not n:
+        return 0
+    m = len(cost[0])
+    u, v, match, way = [0] * (n + 1), [0] * (m + 1), [0] * (m + 1), [0] * (m + 1)
+    for row in range(1,n + 1):
+        match[0], col0 = row, 0
+        minv, used = [INF] * (m + 1), [False] * (m + 1)
+        while match[col0]:
+            used[col0] = True
+            row0, delta, col1 = match[col0], INF, None
+            for col in range(1,m + 1):
+                if used[col]:
+                    continue
+                cur = cost[row0 - 1][col - 1] - u[row0] - v[col]
+                if cur < minv[col]:
+                    minv[col], way[col] = cur, col0
+                if minv[col] < delta:
+                    delta, col1 = minv[col], col
+            if col1 is None or delta == INF:
+                return INF
+            for col in range(m + 1):
+                if used[col]:
+                    u[match[col]] += delta
+                    v[col] -= delta
+                else:
+                    minv[col] -= delta
+            col0 = col1
+        while col0:
+            col1 = way[col0]
+            match[col0] = match[col1]
+            col0 = col1
+    return sum(cost[match[col] - 1][col - 1] for col in range(1,m + 1) if match[col])
+
+def rebuild_path(parent,state):
+    """Follow parent links (state -> previous * 4 + direction) back to the start"""
+    moves = []
+    while parent[state] is not None:
+        state, d = divmod(parent[state],len(directions))
+        moves.append(directions[d])
+    return moves[::-1]
+
+def rebuild_push_path(level,parent,state):
+    """Like rebuild_path for push-level parents, filling in the walks"""
+    pushes = []
+    while parent[state] is not None:
+        prev, d = divmod(parent[state],len(directions))
+        pushes.append((prev,d,state))
+        state = prev
+    moves = []
+    for prev,d,state in reversed(pushes):
+        boxes, player = divmod(prev,level.size)
+        behind = level.step[state % level.size][d ^ 1]
+        moves += level.walk_path(boxes,player,behind) + [directions[d]]
+    return moves
+
+def solve_pushes(level,start):
+    """
+    BFS with one edge per push (so the fewest pushes) over states whose
+    player is normalized to its reachable region.  parent maps a state
+    to (previous state, cell pushed from, direction) packed in an int;
+    the walks between pushes are filled in once the goal is found
+    """
+    size, ways = level.size, len(directions)
+    start = level.normalize(start)
+    parent, queue = {start: None}, collections.deque([start])
+    while queue:
+        state = queue.popleft()
+        boxes, player = divmod(state,size)
+        for cell,d,new_boxes,nxt in level.pushes_from(boxes,level.region(boxes,player)):
+            child = level.normalize(new_boxes * size + nxt)
+            if child in parent:
                 continue
-            elif solved(neighbor[1]):
-                return path(look_at + (neighbor,))
-            seen.add(seen_hash(neighbor))
-            if not terminate(neighbor,wall,target): 
-                new_path = look_at + (neighbor,)
-                queue.append(new_path)
+            parent[child] = (state * size + cell) * ways + d
+            if new_boxes == level.targets:
+                return parent, child
+            queue.append(child)
     return None
 
+def parent_pushes(level,parent,state):
+    """
+    Follow a normalized parent chain back to its root
+    Returns the (boxes, cell pushed from, direction) of each link, from
+    state backwards, and the root state
+    """
+    size, ways, pushes = level.size, len(directions), []
+    while parent[state] is not None:
+        rest, d = divmod(parent[state],ways)
+        prev, cell = divmod(rest,size)
+        pushes.append((prev // size,cell,d))
+        state = prev
+    return pushes, state
+
+def pushes_to_moves(level,pushes,player):
+    """Moves for a list of (boxes, cell pushed from, direction), walks included"""
+    moves = []
+    for boxes,cell,d in pushes:
+        moves += level.walk_path(boxes,player,cell) + [directions[d]]
+        player = level.step[cell][d]
+    return moves
+
+def rebuild_normalized_path(level,parent,state,player):
+    """Moves for a solve_pushes parent chain, starting from player"""
+    pushes, _ = parent_pushes(level,parent,state)
+    return pushes_to_moves(level,pushes[::-1],player)
 
+def goal_states(level):
+    """
+    Normalized states with every box on a target and the player in
+    some region next to a box (where the last push left it)
+    """
+    boxes, size, roots = level.targets, level.size, set()
+    seen = set()
+    for cell in range(size):
+        if level.walls[cell] or boxes >> cell & 1 or cell in seen:
+            continue
+        region = level.region(boxes,cell)
+        seen |= region
+        if any(nxt >= 0 and boxes >> nxt & 1 for c in region for nxt in level.step[c]):
+            roots.add(boxes * size + min(region))
+    return roots
+
+def pulls(level,state):
+    """
+    Backward moves: (child, cell, direction) where pulling a box into
+    the player's region gives child, and pushing from cell in
+    direction undoes it (from child back to state)
+    """
+    size, step, dead = level.size, level.step, level.dead
+    boxes, player = divmod(state,size)
+    level.stats["expanded"] += 1
+    for cell in level.region(boxes,player):
+        for d,box in enumerate(step[cell]):
+            if box < 0 or not boxes >> box & 1:
+                continue
+            back = step[cell][d ^ 1]
+            if back < 0 or boxes >> back & 1 or dead[cell]:
+                continue
+            new_boxes = boxes ^ (1 << box) ^ (1 << cell)
+            yield level.normalize(new_boxes * size + back), back, d
+
+def solve_bidirectional(level,start,max_states = 2_000_000,stats = None):
+    """
+    Layered BFS forward over pushes from the start and backward over
+    pulls from every goal state (both normalized), always growing the
+    smaller frontier, until a state is seen from both sides
+    Gives up (returns None, with stats['capped'] set) once more than
+    max_states states are stored, instead of running out of memory
+    Returns the full move list
+    """
+    size, ways = level.size, len(directions)
+    player = start % size
+    start = level.normalize(start)
+    forward, backward = {start: None}, dict.fromkeys(goal_states(level))
+    meet = start if start in backward else None
+    layers = [[start],list(backward)]
+    while meet is None and layers[0] and layers[1]:
+        if len(forward) + len(backward) > max_states:
+            if stats is not None:
+                stats["capped"] = True
+            return None
+        side = 0 if len(layers[0]) <= len(layers[1]) else 1
+        mine, other = (forward,backward) if side == 0 else (backward,forward)
+        nxt_layer = []
+        for state in layers[side]:
+            if side == 0:
+                boxes, player_cell = divmod(state,size)
+                children = ((level.normalize(new_boxes * size + nxt),(state * size + cell) * ways + d)
+                    for cell,d,new_boxes,nxt in level.pushes_from(boxes,level.region(boxes,player_cell)))
+            else:
+                children = ((child,(state * size + cell) * ways + d)
+                    for child,cell,d in pulls(level,state))
+            for child,link in children:
+                if child in mine:
+                    continue
+                mine[child] = link
+                if child in other:
+                    meet = child
+                    break
+                nxt_layer.append(child)
+            if meet is not None:
+                break
+        layers[side] = nxt_layer
+    if meet is None:
+        return None
+    head, _ = parent_pushes(level,forward,meet)
+    tail = []
+    state = meet
+    while backward[state] is not None:
+        rest, d = divmod(backward[state],ways)
+        prev, cell = divmod(rest,size)
+        tail.append((state // size,cell,d))
+        state = prev
+    return pushes_to_moves(level,head[::-1] + tail,player)
+
+def search_space(level,optimize):
+    """
+    Expansion and heuristic for the informed searches
+    optimize='moves': one node per player step, cost (moves, pushes)
+    optimize='pushes': one node per push, cost (pushes, moves)
+    Each expand(state) yields (direction, next state, cost increment)
+    """
+    size = level.size
+    if optimize == 'moves':
+        def expand(state):
+            for d,nxt in level.successors(state):
+                yield d, nxt, (1,int(nxt // size != state // size))
+        def heuristic(state):
+            return level.lower_bound(state // size) + level.walk_bound(state)
+    elif optimize == 'pushes':
+        def expand(state):
+            for d,nxt,steps in level.pushes(state):
+                yield d, nxt, (1,steps + 1)
+        def heuristic(state):
+            return level.lower_bound(state // size)
+    else:
+        raise ValueError(f"optimize must be 'moves' or 'pushes', not {optimize!r}")
+    return expand, heuristic
+
+def astar(level,start,optimize):
+    """
+    A* with the matching lower bound (admissible for either criterion).
+    Ties on f go to the smaller heuristic, i.e. the node nearer the
+    goal, so a plateau of equal f is searched depth-first rather than
+    swept; then to the smaller second cost
+    Returns the parent table and the goal state, or None
+    """
+    expand, heuristic = search_space(level,optimize)
+    parent, best = {start: None}, {start: (0,0)}
+    order = itertools.count()
+    h = heuristic(start)
+    frontier = [(h,h,0,next(order),start,(0,0))]
+    while frontier:
+        *_,state,cost = heapq.heappop(frontier)
+        if best[state] != cost:
+            continue
+        if level.solved(state):
+            return parent, state
+        for d,nxt,(first_inc,second_inc) in expand(state):
+            new = (cost[0] + first_inc,cost[1] + second_inc)
+            if nxt in best and best[nxt] <= new:
+                continue
+            h = heuristic(nxt)
+            if h == INF:
+                continue
+            best[nxt], parent[nxt] = new, state * len(directions) + d
+            heapq.heappush(frontier,(new[0] + h,h,new[1],next(order),nxt,new))
+    return None
+
+def idastar(level,start,optimize,table = None):
+    """
+    IDA*: depth-first with a growing bound on cost + heuristic (first
+    cost only), remembering just the current path
+    With a TranspositionTable, states already reached as cheaply in this
+    iteration are skipped (keys updated incrementally along the path),
+    which bounds the re-expansions with a fixed amount of memory
+    Returns the list of (direction, state) steps to the goal, or None
+    """
+    expand, heuristic = search_space(level,optimize)
+    bound = heuristic(start)
+    while bound != INF:
+        path, on_path, smallest = [], {start}, INF
+        key = None
+        if table is not None:
+            table.clear()
+            key = level.zobrist(start)
+            table.store(key,0)
+        stack = [(start,0,expand(start),key)]
+        while stack:
+            state, cost, children, key = stack[-1]
+            for d,nxt,(inc,_) in children:
+                if nxt in on_path:
+                    continue
+                f = cost + inc + heuristic(nxt)
+                if f > bound:
+                    smallest = min(smallest,f)
+                    continue
+                nxt_key = None
+                if table is not None:
+                    nxt_key = level.zobrist_step(key,state,nxt)
+                    seen = table.lookup(nxt_key)
+                    if seen is not None and seen <= cost + inc:
+                        continue
+                    table.store(nxt_key,cost + inc)
+                path.append((d,nxt))
+                if level.solved(nxt):
+                    return path
+                on_path.add(nxt)
+                stack.append((nxt,cost + inc,expand(nxt),nxt_key))
+                break
+            else:
+                stack.pop()
+                if path:
+                    on_path.discard(path.pop()[1])
+        bound = smallest
+    return None
+
+def solve_puzzle(game,method = 'bfs',optimize = 'moves',stats = None,max_states = 2_000_000,
+        table = None):
+    """
+    method 'bfs': BFS over packed states with a parent table; the path
+    is only rebuilt once the goal is found (fewest moves)
+    method 'astar' / 'idastar': informed search with the box-to-target
+    matching heuristic, for the fewest 'moves' or 'pushes' (optimize)
+    method 'push': BFS over pushes with the player normalized to its
+    reachable region (fewest pushes, much smaller visited set)
+    method 'bidirectional': push-level search from the start meeting a
+    pull-level search from the goal, stopped after max_states states
+    table: a TranspositionTable for 'idastar', which then prunes repeated
+    states within a fixed memory budget (see table.report())
+    If stats is a dict, it gets the number of pushes each deadlock rule
+    pruned ('dead_square', 'wall_line', 'freeze') and of states expanded
+    ('expanded')
+    Also checks if already solved at beginning
+    """
+    level = Level(game)
+    if stats is not None:
+        level.stats = stats
+        stats.update({key: 0 for key in ("dead_square","wall_line","freeze","expanded")})
+    start = level.pack(game)
+    if level.solved(start):
+        return []
+    if not level.balanced:
+        return None
+    if method in ('astar','idastar'):
+        return solve_informed(level,start,method,optimize,table)
+    if method == 'bidirectional':
+        return solve_bidirectional(level,start,max_states,stats)
+    if method == 'push':
+        found = solve_pushes(level,start)
+        return None if found is None else \
+            rebuild_normalized_path(level,*found,start % level.size)
+    parent = {start: None}
+    queue = collections.deque([start])
+    while queue:
+        state = queue.popleft()
+        for d,neighbor in level.successors(state):
+            if neighbor in parent:
+                continue
+            parent[neighbor] = state * len(directions) + d
+            if level.solved(neighbor):
+                return rebuild_path(parent,neighbor)
+            queue.append(neighbor)
+    return None
 
+def solve_informed(level,start,method,optimize,table = None):
+    if method == 'astar':
+        found = astar(level,start,optimize)
+        if found is None:
+            return None
+        parent, goal = found
+        if optimize == 'pushes':
+            return rebuild_push_path(level,parent,goal)
+        return rebuild_path(parent,goal)
+    steps = idastar(level,start,optimize,table)
+    if steps is None:
+        return None
+    if optimize == 'moves':
+        return [directions[d] for d,_ in steps]
+    parent, prev = {start: None}, start
+    for d,state in steps:
+        parent[state], prev = prev * len(directions) + d, state
+    return rebuild_push_path(level,parent,prev)
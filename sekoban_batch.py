@@ -0,0 +1,207 @@
+"""
+Batch sekoban solving: reads level collections in the XSB text format
+and solves every level in its own worker process under a wall-clock and
+memory limit, writing a JSON or CSV report (status, solution length,
+pushes, states expanded, seconds, solution in LURD notation)
+
+    python sekoban_batch.py levels.xsb -o report.json --timeout 60 --memory 2048
+    python sekoban_batch.py a.xsb b.xsb -o report.csv -m astar --optimize pushes
+
+XSB: '#' wall, '$' computer, '.' target, '@' player, '*' computer on a
+target, '+' player on a target, ' ', '-' or '_' floor.  Lines starting
+with ';' are comments (the last one before a level names it, unless a
+'Title:' line follows the level), anything else ends a level
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import sekoban
+
+PIECES = {
+    "#": ["wall"],
+    "$": ["computer"],
+    ".": ["target"],
+    "@": ["player"],
+    "*": ["computer","target"],
+    "+": ["player","target"],
+    " ": [], "-": [], "_": [],
+}
+FIELDS = ("level","title","status","solved","length","pushes","expanded","seconds","solution")
+
+
+def is_board_line(line):
+    return "#" in line and all(ch in PIECES for ch in line)
+
+def to_description(rows):
+    """XSB rows -> level description for sekoban.new_game (rows padded to the widest)"""
+    width = max(len(row) for row in rows)
+    return [[list(PIECES[ch]) for ch in row.ljust(width)] for row in rows]
+
+def parse_xsb(text):
+    """
+    All the levels in an XSB collection
+    Returns a list of (title, level description)
+    """
+    levels, rows, comment = [], [], None
+    for line in text.splitlines():
+        line = line.rstrip("\r\n").rstrip()
+        if is_board_line(line):
+            rows.append(line)
+            continue
+        if rows:
+            levels.append([comment,to_description(rows)])
+            rows, comment = [], None
+        if line.lower().startswith("title:") and levels:
+            levels[-1][0] = line[6:].strip()
+        elif line.startswith(";"):
+            comment = line[1:].strip() or comment
+    if rows:
+        levels.append([comment,to_description(rows)])
+    return [(title or f"level {i + 1}",desc) for i,(title,desc) in enumerate(levels)]
+
+def read_xsb(path):
+    with open(path) as file:
+        return parse_xsb(file.read())
+
+def lurd(game,moves):
+    """Solution in LURD notation (upper case for pushes) and its push count"""
+    engine = sekoban.Engine(game)
+    letters = []
+    for direction in moves:
+        engine.step(direction)
+        letter = direction[0]
+        letters.append(letter.upper() if engine.log[-1] & 4 else letter)
+    return "".join(letters), sum(letter.isupper() for letter in letters)
+
+def solve_level(conn,description,method,optimize,memory):
+    """
+    Worker process: solve one level and send back its result dict
+    memory (bytes) caps the address space where the platform allows it
+    """
+    if memory and resource is not None:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS,(memory,memory))
+        except (ValueError,OSError):
+            pass
+    stats = {}
+    start = time.perf_counter()
+    try:
+        moves = sekoban.solve_puzzle(sekoban.new_game(description),method,optimize,stats)
+        result = {"status": "solved" if moves is not None else "unsolvable"}
+        if moves is not None:
+            solution, pushes = lurd(sekoban.new_game(description),moves)
+            result.update(length = len(moves),pushes = pushes,solution = solution)
+    except MemoryError:
+        result = {"status": "memory"}
+    result.update(seconds = time.perf_counter() - start,expanded = stats.get("expanded"))
+    conn.send(result)
+    conn.close()
+
+def run_batch(levels,method = "push",optimize = "moves",workers = None,timeout = None,memory = None):
+    """
+    Solve (title, description) levels, one process each with at most
+    workers running at a time.  A level still running after timeout
+    seconds is terminated (status 'timeout'); one that runs out of
+    memory reports 'memory', or 'crashed' if the process died
+    Yields result dicts (see FIELDS) as levels finish
+    """
+    workers = workers or os.cpu_count() or 1
+    todo = iter(enumerate(levels))
+    running = {}
+    try:
+        while True:
+            for index,(title,description) in todo:
+                recv, send = multiprocessing.Pipe(duplex = False)
+                process = multiprocessing.Process(target = solve_level,
+                    args = (send,description,method,optimize,memory),daemon = True)
+                process.start()
+                send.close()
+                deadline = time.monotonic() + timeout if timeout else None
+                running[recv] = (index + 1,title,process,deadline,time.perf_counter())
+                if len(running) >= workers:
+                    break
+            if not running:
+                return
+            deadlines = [entry[3] for entry in running.values() if entry[3] is not None]
+            wait = max(0.0,min(deadlines) - time.monotonic()) if deadlines else None
+            for conn in multiprocessing.connection.wait(list(running),wait):
+                level, title, process, _, start = running.pop(conn)
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    result = {"status": "crashed","seconds": time.perf_counter() - start}
+                conn.close()
+                process.join()
+                yield report_row(level,title,result)
+            now = time.monotonic()
+            for conn in [conn for conn,entry in running.items() if entry[3] is not None and entry[3] <= now]:
+                level, title, process, _, start = running.pop(conn)
+                process.terminate()
+                process.join()
+                conn.close()
+                yield report_row(level,title,{"status": "timeout","seconds": time.perf_counter() - start})
+    finally:
+        for conn,(_,_,process,_,_) in running.items():
+            process.terminate()
+            process.join()
+            conn.close()
+
+def report_row(level,title,result):
+    row = dict.fromkeys(FIELDS)
+    row.update(result,level = level,title = title,solved = result["status"] == "solved")
+    return row
+
+def write_report(rows,file,fmt):
+    if fmt == "json":
+        json.dump(rows,file,indent = 1)
+        file.write("\n")
+    else:
+        writer = csv.DictWriter(file,FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument("inputs",nargs = "+",help = "XSB level files")
+    parser.add_argument("-o","--output",help = "report file (default stdout)")
+    parser.add_argument("-f","--format",choices = ("json","csv"),
+        help = "report format (default: from the output extension, else json)")
+    parser.add_argument("-m","--method",default = "push",
+        choices = ("bfs","astar","idastar","push","bidirectional"))
+    parser.add_argument("--optimize",default = "moves",choices = ("moves","pushes"))
+    parser.add_argument("-w","--workers",type = int,default = None,help = "processes (default: one per CPU)")
+    parser.add_argument("-t","--timeout",type = float,default = None,help = "seconds per level")
+    parser.add_argument("--memory",type = int,default = None,help = "MiB per level")
+    args = parser.parse_args(argv)
+
+    levels = [level for path in args.inputs for level in read_xsb(path)]
+    fmt = args.format or ("csv" if args.output and args.output.endswith(".csv") else "json")
+    memory = args.memory << 20 if args.memory else None
+    rows = []
+    for row in run_batch(levels,args.method,args.optimize,args.workers,args.timeout,memory):
+        rows.append(row)
+        print(f"{row['level']}\t{row['title']}\t{row['status']}\t{row['seconds']:.2f}s",file = sys.stderr)
+    rows.sort(key = lambda row: row["level"])
+    out = sys.stdout if args.output is None else open(args.output,"w",newline = "")
+    try:
+        write_report(rows,out,fmt)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    solved = sum(row["solved"] for row in rows)
+    print(f"solved {solved} of {len(rows)}",file = sys.stderr)
+    return rows
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,790 @@
-
-import sys
+import functools
+import heapq
+import random
 import time
+from array import array
+
+
+class VariableMap:
+    """
+    Two-way map between variables (any hashable, e.g. (r,c,val))
+    and the dense ints 1..n used as literals
+    """
+    def __init__(self):
+        self.index, self.variables = {}, []
+
+    def __len__(self):
+        return len(self.variables)
+
+    def number(self,var):
+        """The int for var (a new one is handed out if unseen)"""
+        if var not in self.index:
+            self.variables.append(var)
+            self.index[var] = len(self.variables)
+        return self.index[var]
+
+    def literal(self,var,boo):
+        return self.number(var) if boo else -self.number(var)
+
+    def variable(self,num):
+        return self.variables[num - 1]
+
+    def decode(self,assignment):
+        """Turn an {int: bool} assignment back into {var: bool}"""
+        if assignment is None: return assignment
+        return {self.variable(num): boo for num,boo in assignment.items()}
+
+class SudokuVariables(VariableMap):
+    """
+    Arithmetic variable map for an n-by-n board:
+    (r,c,val) <-> r*n*n + c*n + val, so no dict is needed
+    """
+    def __init__(self,n):
+        self.n = n
+
+    def __len__(self):
+        return self.n ** 3
+
+    def number(self,var):
+        r,c,val = var
+        return (r * self.n + c) * self.n + val
+
+    def variable(self,num):
+        rc,val = divmod(num - 1,self.n)
+        return divmod(rc,self.n) + (val + 1,)
 
-sys.setrecursionlimit(10_000)
+class CNF:
+    """
+    Clauses stored flat as signed ints in an array('i'),
+    each clause terminated by a 0 (the DIMACS layout)
+    """
+    def __init__(self,num_vars = 0):
+        self.num_vars, self.num_clauses = num_vars, 0
+        self.literals = array('i')
+
+    def __len__(self):
+        return self.num_clauses
+
+    def __iter__(self):
+        clause = []
+        for lit in self.literals:
+            if lit:
+                clause.append(lit)
+            else:
+                yield clause
+                clause = []
+
+    def add(self,clause):
+        self.literals.extend(clause)
+        self.literals.append(0)
+        self.num_clauses += 1
+        self.num_vars = max(self.num_vars,max(map(abs,clause),default = 0))
+
+def write_dimacs(formula,file):
+    """
+    Write a CNF (or list of int clauses) to a path or open text file
+    in DIMACS format
+    """
+    if isinstance(file,str):
+        with open(file,'w') as f:
+            return write_dimacs(formula,f)
+    clauses = formula if isinstance(formula,CNF) else to_cnf(formula)
+    file.write(f'p cnf {clauses.num_vars} {len(clauses)}\n')
+    for clause in clauses:
+        file.write(' '.join(map(str,clause + [0])) + '\n')
 
+def read_dimacs(file):
+    """
+    Read a DIMACS CNF from a path or open text file, line by line
+    Clauses may span lines; comments ('c') are skipped and reading stops
+    at a '%' line (the SATLIB trailer, which is followed by a stray 0).
+    An empty clause at the very end is dropped for the same reason
+
+    >>> import io
+    >>> list(read_dimacs(io.StringIO('p cnf 3 2\\n1 -3 0\\n2 3 -1 0\\n%\\n0\\n')))
+    [[1, -3], [2, 3, -1]]
+    >>> list(read_dimacs(io.StringIO('p cnf 3 2\\n1 -3 0\\n2 3 -1 0\\n0\\n')))
+    [[1, -3], [2, 3, -1]]
+    """
+    if isinstance(file,str):
+        with open(file) as f:
+            return read_dimacs(f)
+    formula, clause = CNF(), []
+    trailing_empty = False
+    for line in file:
+        line = line.strip()
+        if line[:1] == '%':
+            break
+        if not line or line[0] == 'c':
+            continue
+        if line[0] == 'p':
+            formula.num_vars = max(formula.num_vars,int(line.split()[2]))
+            continue
+        for lit in map(int,line.split()):
+            if lit:
+                if trailing_empty:
+                    formula.add([])
+                    trailing_empty = False
+                clause.append(lit)
+            elif clause:
+                formula.add(clause)
+                clause = []
+            elif trailing_empty:
+                formula.add([])
+            else:
+                # held back: an empty clause only counts if more follows
+                trailing_empty = True
+    if clause:
+        formula.add(clause)
+    return formula
 
-bool_list = [True,False]
+def to_cnf(clauses):
+    """Pack a list of int clauses into a CNF"""
+    formula = CNF()
+    for clause in clauses:
+        formula.add(clause)
+    return formula
 
-def new_formula(formula,curr_var,curr_bool):
+def literal_table(formula,variables = None):
     """
-    Remove any lines that will always be true
-    given the variables 
+    Turn a formula of ((var),bool) clauses into a CNF of signed ints
+    Returns the CNF and the VariableMap used
     """
-    # Sort shortest to longest (one-chains, then ...)
-    new = []
+    variables = VariableMap() if variables is None else variables
+    clauses = CNF(len(variables))
     for section in formula:
-        insert, add = [],True
-        for var,boo in section:
-            if var != curr_var:
-                insert.append((var,boo))
-            elif not boo ^ curr_bool:
-                add = False
+        clauses.add([variables.literal(var,boo) for var,boo in section])
+    return clauses, variables
+
+def pure_literals(clauses,value):
+    """
+    Assign (at the root) every literal whose negation never appears
+    in a clause that is still unsatisfied, until none are left
+    Returns the clauses that are still unsatisfied
+    """
+    while True:
+        seen = set()
+        for clause in clauses:
+            seen.update(clause)
+        pure = [lit for lit in seen if -lit not in seen and not value[lit]]
+        if not pure:
+            return clauses
+        for lit in pure:
+            value[lit], value[-lit] = 1, -1
+        clauses = [clause for clause in clauses
+            if not any(value[lit] == 1 for lit in clause)]
+
+class DPLL:
+    """
+    DPLL over int clauses with two watched literals per clause
+    and a trail of assigned literals (undone on backtrack)
+
+    value is indexed by literal: value[lit] is 1 (true), -1 (false)
+    or 0 (unassigned); negative literals use Python's wrap-around
+    indexing, so the list has 2 * num_vars + 1 entries
+
+    After a model is found, calling solve again continues the search
+    for the next one.  Pure-literal elimination loses models, so turn
+    it off (pure=False) when enumerating
+
+    For decide, every long clause keeps its count of unassigned
+    literals and is filed in a heap (by clause index) for that count.
+    The counts are brought up to date from the trail when deciding (and
+    rolled back by undo), so a decision costs the literals assigned
+    since the last one, not a pass over the formula.  Entries are filed
+    lazily: a clause whose count has moved on is dropped when it comes
+    up, and a satisfied one is parked under its true literal until that
+    is unassigned
+    """
+    def __init__(self,clauses,num_vars,pure = True):
+        self.num_vars = num_vars
+        self.value = [0] * (2 * num_vars + 1)
+        self.trail, self.qhead = [], 0
+        self.watches = [[] for _ in range(2 * num_vars + 1)]
+        self.clauses, self.long, self.ok = [], [], True
+        self.occurs = [[] for _ in range(2 * num_vars + 1)]
+        self.free, self.parked, self.parking = [], [], {}
+        self.buckets, self.counted = [[]], 0
+        self.stats = {'decisions': 0, 'conflicts': 0, 'propagations': 0}
+        self.decisions, self.started = [], False
+        self.order = self.occurrence_order(clauses)
+        clauses = self.normalize(clauses)
+        if pure:
+            clauses = pure_literals(clauses,self.value)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def normalize(self,clauses):
+        """Drop duplicate literals and tautologies"""
+        result = []
+        for clause in clauses:
+            lits = list(dict.fromkeys(clause))
+            if not any(-lit in lits for lit in lits):
+                result.append(lits)
+        return result
+
+    def occurrence_order(self,clauses):
+        """Literals sorted by how often they occur (fallback decisions)"""
+        count = [0] * (2 * self.num_vars + 1)
+        for clause in clauses:
+            for lit in clause:
+                count[lit] += 1
+        lits = [v if count[v] >= count[-v] else -v
+            for v in range(1,self.num_vars+1)]
+        return sorted(lits,key = lambda lit: -count[lit] - count[-lit])
+
+    def add_clause(self,clause):
+        """Watch the first two literals, or assign a unit clause"""
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            if self.value[clause[0]] == -1:
+                self.ok = False
+            elif not self.value[clause[0]]:
+                self.assign(clause[0])
+        else:
+            index = len(self.clauses)
+            self.clauses.append(clause)
+            self.watches[clause[0]].append(index)
+            self.watches[clause[1]].append(index)
+            if len(clause) > 2:
+                self.track(clause)
+
+    def track(self,clause):
+        """Add a long clause to the free-literal buckets"""
+        index = len(self.long)
+        self.long.append(clause)
+        for lit in clause:
+            self.occurs[lit].append(index)
+        while len(self.buckets) <= len(clause):
+            self.buckets.append([])
+        self.free.append(len(clause))
+        self.parked.append(0)
+        self.buckets[len(clause)].append(index)
+
+    def assign(self,lit,reason = None):
+        self.value[lit], self.value[-lit] = 1, -1
+        self.trail.append(lit)
+
+    def count(self):
+        """Bring the free counts up to date with the trail"""
+        free, parked, buckets, occurs = self.free, self.parked, self.buckets, self.occurs
+        push = heapq.heappush
+        for lit in self.trail[self.counted:]:
+            for index in occurs[-lit]:
+                free[index] -= 1
+                if not parked[index]:
+                    push(buckets[free[index]],index)
+        self.counted = len(self.trail)
+
+    def uncount(self,size):
+        """
+        Roll the free counts back to the first size trail entries, and
+        put back the clauses parked under literals being unassigned
+        """
+        free, parked, buckets, occurs = self.free, self.parked, self.buckets, self.occurs
+        push = heapq.heappush
+        for lit in reversed(self.trail[size:self.counted]):
+            for index in occurs[-lit]:
+                free[index] += 1
+                if not parked[index]:
+                    push(buckets[free[index]],index)
+            for index in self.parking.pop(lit,()):
+                parked[index] = 0
+                push(buckets[free[index]],index)
+        self.counted = size
+
+    def undo(self,size):
+        """Unassign everything on the trail past size"""
+        if size < self.counted:
+            self.uncount(size)
+        value = self.value
+        for lit in self.trail[size:]:
+            value[lit] = value[-lit] = 0
+        del self.trail[size:]
+        self.qhead = min(self.qhead,size)
+
+    def propagate(self):
+        """
+        Unit propagation over the watch lists
+        Returns the index of a conflicting clause, or None
+        """
+        value, trail, clauses, watches = self.value, self.trail, self.clauses, self.watches
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            self.stats['propagations'] += 1
+            watching, keep = watches[false_lit], []
+            for pos,index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                if value[clause[0]] == 1:
+                    keep.append(index)
+                    continue
+                for k in range(2,len(clause)):
+                    if value[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    keep.append(index)
+                    if value[clause[0]] == -1:
+                        keep.extend(watching[pos+1:])
+                        watches[false_lit] = keep
+                        return index
+                    self.assign(clause[0],index)
+            watches[false_lit] = keep
+        return None
+
+    def decide(self):
+        """
+        Pick an unsatisfied long clause with the fewest free literals
+        (shortest clause first) and return its first free literal;
+        otherwise the most frequent free literal, or None if all assigned
+        """
+        value, free, parked = self.value, self.free, self.parked
+        self.count()
+        if sum(map(len,self.buckets)) > 4 * len(self.long) + 1000:
+            self.buckets = [[] for _ in self.buckets]
+            for index,count in enumerate(free):
+                if not parked[index]:
+                    self.buckets[count].append(index)
+        for count,bucket in enumerate(self.buckets):
+            while bucket:
+                index = bucket[0]
+                if parked[index] or free[index] != count:
+                    heapq.heappop(bucket)
+                    continue
+                first = None
+                for lit in self.long[index]:
+                    if value[lit] == 1:
+                        # satisfied: parked until lit is unassigned
+                        heapq.heappop(bucket)
+                        parked[index] = lit
+                        self.parking.setdefault(lit,[]).append(index)
+                        break
+                    if not value[lit] and first is None:
+                        first = lit
+                else:
+                    return first
+        for lit in self.order:
+            if not value[lit]:
+                return lit
+        return None
+
+    def backtrack(self):
+        """
+        Undo back to the most recent decision not yet flipped and flip it
+        Returns False if every decision has been flipped (search is over)
+        """
+        decisions = self.decisions
+        while decisions and decisions[-1][2]:
+            decisions.pop()
+        if not decisions:
+            return False
+        size,lit,_ = decisions.pop()
+        self.undo(size)
+        decisions.append((size,-lit,True))
+        self.assign(-lit)
+        return True
+
+    def start(self):
+        """
+        First call: propagate the root; later calls: step past the last
+        model.  Returns False if there is nothing (more) to search
+        """
+        if self.started:
+            return self.ok and self.resume()
+        self.started = True
+        self.ok = self.ok and self.propagate() is None
+        return self.ok
+
+    def resume(self):
+        self.ok = self.backtrack()
+        return self.ok
+
+    def solve(self):
+        """
+        Chronological backtracking: each decision is tried, then flipped
+        Returns True if satisfiable (self.value holds the model)
+        """
+        if not self.start():
+            return False
+        while True:
+            while self.propagate() is not None:
+                self.stats['conflicts'] += 1
+                if not self.backtrack():
+                    self.ok = False
+                    return False
+            lit = self.decide()
+            if lit is None:
+                return True
+            self.stats['decisions'] += 1
+            self.decisions.append((len(self.trail),lit,False))
+            self.assign(lit)
+
+    def model(self):
+        """Values of variables 1..num_vars (unconstrained ones are False)"""
+        return [self.value[v] == 1 for v in range(1,self.num_vars+1)]
+
+def luby(i):
+    """The i-th term (from 1) of the Luby sequence 1,1,2,1,1,2,4,..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+class CDCL(DPLL):
+    """
+    Conflict-driven clause learning on top of the DPLL watch lists:
+    1-UIP learned clauses, non-chronological backjumping, VSIDS
+    variable activity with phase saving, Luby restarts, and a learned
+    clause database that is halved (by LBD) at restarts once it grows
+    past its limit
+
+    Both engines on a satisfiable formula, an unsatisfiable one and
+    three pigeons in two holes (unsatisfiable only after some search):
+
+    >>> sat = [[1, 2], [-1, 2], [-2, 3]]
+    >>> unsat = [[1, 2], [1, -2], [-1, 2], [-1, -2]]
+    >>> pigeons = [[2 * i + 1, 2 * i + 2] for i in range(3)] + [[-(2 * i + j), -(2 * k + j)]
+    ...     for j in (1, 2) for i in range(3) for k in range(i + 1, 3)]
+    >>> for engine in (DPLL, CDCL):
+    ...     solver = engine(sat, 3)
+    ...     print(engine.__name__, solver.solve(), solver.model(),
+    ...         engine(unsat, 2).solve(), engine(pigeons, 6).solve())
+    DPLL True [True, True, True] False False
+    CDCL True [True, True, True] False False
+
+    Enumeration (pure=False): exactly one of 1, 2, 3 has three models
+
+    >>> one = [[1, 2, 3], [-1, -2], [-1, -3], [-2, -3]]
+    >>> for engine in (DPLL, CDCL):
+    ...     solver, models = engine(one, 3, pure = False), []
+    ...     while solver.solve():
+    ...         models.append(solver.model())
+    ...     print(engine.__name__, sorted(models))
+    DPLL [[False, False, True], [False, True, False], [True, False, False]]
+    CDCL [[False, False, True], [False, True, False], [True, False, False]]
+    """
+    restart_unit, decay = 100, 0.95
+
+    def __init__(self,clauses,num_vars,pure = True):
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        self.trail_lim = []
+        super().__init__(clauses,num_vars,pure)
+        self.stats.update({'learned': 0, 'deleted': 0, 'restarts': 0})
+        self.num_original = len(self.clauses)
+        self.lbd = {}
+        self.max_learned = max(len(self.clauses) // 3,1000)
+        self.activity, self.bump_by = [0.0] * (num_vars + 1), 1.0
+        self.phase = [False] * (num_vars + 1)
+        for lit in self.order:
+            self.phase[abs(lit)] = lit > 0
+        self.heap = [(0.0,rank,abs(lit)) for rank,lit in enumerate(self.order)]
+        self.rank = {abs(lit): rank for rank,lit in enumerate(self.order)}
+
+    def track(self,clause):
+        """Long clauses need no free-literal buckets (decide uses activity)"""
+        self.long.append(clause)
+
+    def assign(self,lit,reason = None):
+        var = abs(lit)
+        self.level[var], self.reason[var] = len(self.trail_lim), reason
+        self.value[lit], self.value[-lit] = 1, -1
+        self.trail.append(lit)
+
+    def backjump(self,level):
+        """Undo every decision level above level, saving phases"""
+        if len(self.trail_lim) <= level:
+            return
+        size = self.trail_lim[level]
+        for lit in self.trail[size:]:
+            var = abs(lit)
+            self.phase[var] = lit > 0
+            heapq.heappush(self.heap,(-self.activity[var],self.rank[var],var))
+        self.undo(size)
+        del self.trail_lim[level:]
+
+    def bump(self,var):
+        self.activity[var] += self.bump_by
+        if self.activity[var] > 1e100:
+            self.activity = [act * 1e-100 for act in self.activity]
+            self.bump_by *= 1e-100
+            self.heap = [(-self.activity[v],self.rank[v],v)
+                for v in range(1,self.num_vars+1) if not self.value[v]]
+            heapq.heapify(self.heap)
+        elif not self.value[var]:
+            heapq.heappush(self.heap,(-self.activity[var],self.rank[var],var))
+
+    def decide(self):
+        """Unassigned variable with the highest activity, at its saved phase"""
+        heap, value = self.heap, self.value
+        if len(heap) > 4 * self.num_vars + 1000:
+            self.heap = heap = [(-self.activity[v],self.rank[v],v)
+                for v in range(1,self.num_vars+1) if not value[v]]
+            heapq.heapify(heap)
+        while heap:
+            var = heapq.heappop(heap)[2]
+            if not value[var]:
+                return var if self.phase[var] else -var
+        return None
+
+    def analyze(self,conflict):
+        """
+        Walk the implication graph back from a conflicting clause to the
+        first unique implication point
+        Returns the learned clause (asserting literal first, then the
+        literal from the backjump level) and the level to backjump to
+        """
+        level, reason, trail, clauses = self.level, self.reason, self.trail, self.clauses
+        current = len(self.trail_lim)
+        seen, learnt, counter = set(), [None], 0
+        clause, lit, index = clauses[conflict], None, len(trail) - 1
+        while True:
+            for q in clause:
+                var = abs(q)
+                if var in seen or level[var] == 0 or (lit and var == abs(lit)):
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if level[var] == current:
+                    counter += 1
+                else:
+                    learnt.append(q)
+            while abs(trail[index]) not in seen:
+                index -= 1
+            lit, index, counter = trail[index], index - 1, counter - 1
+            if not counter:
                 break
-        if add:
-            new.append(insert)
-    return new
+            clause = clauses[reason[abs(lit)]]
+        learnt[0] = -lit
+        if len(learnt) == 1:
+            return learnt, 0
+        top = max(range(1,len(learnt)),key = lambda i: level[abs(learnt[i])])
+        learnt[1], learnt[top] = learnt[top], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def learn(self,learnt,lbd = None):
+        """Store a learned clause and assert its first literal"""
+        self.stats['learned'] += 1
+        if len(learnt) == 1:
+            self.assign(learnt[0])
+            return
+        index = len(self.clauses)
+        self.clauses.append(learnt)
+        self.watches[learnt[0]].append(index)
+        self.watches[learnt[1]].append(index)
+        if lbd is None:
+            lbd = len({self.level[abs(lit)] for lit in learnt})
+        self.lbd[index] = lbd
+        self.assign(learnt[0],index)
+
+    def resume(self):
+        """
+        Block the model just found with a clause of its negated decisions
+        (LBD 0, so it is never deleted), backjump below the last decision
+        and carry on from there
+        """
+        if not self.trail_lim:
+            self.ok = False
+            return False
+        blocking = [-self.trail[size] for size in reversed(self.trail_lim)]
+        self.backjump(len(self.trail_lim) - 1)
+        self.learn(blocking,0)
+        return True
+
+    def reduce(self):
+        """
+        At level 0: keep learned clauses with LBD <= 2 and the better half
+        of the rest, then compact the clause list and rebuild the watches
+        """
+        learned = sorted(self.lbd,key = lambda i: (self.lbd[i],i))
+        half = len(learned) // 2
+        keep = sorted(i for rank,i in enumerate(learned)
+            if rank < half or self.lbd[i] <= 2)
+        self.stats['deleted'] += len(learned) - len(keep)
+        self.clauses = self.clauses[:self.num_original] + [self.clauses[i] for i in keep]
+        self.lbd = {self.num_original + pos: self.lbd[i] for pos,i in enumerate(keep)}
+        self.watches = [[] for _ in range(2 * self.num_vars + 1)]
+        for index,clause in enumerate(self.clauses):
+            self.watches[clause[0]].append(index)
+            self.watches[clause[1]].append(index)
+        for lit in self.trail:
+            self.reason[abs(lit)] = None
+        self.max_learned = int(self.max_learned * 1.1)
 
-def recurse(formula,var,boolean):
+    def solve(self):
+        """
+        Returns True if satisfiable (self.value holds the model)
+        """
+        if not self.start():
+            return False
+        restarts = 1
+        budget = luby(restarts) * self.restart_unit
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats['conflicts'] += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backjump(level)
+                self.learn(learnt)
+                self.bump_by /= self.decay
+                budget -= 1
+                continue
+            if budget <= 0:
+                self.stats['restarts'] += 1
+                self.backjump(0)
+                if len(self.lbd) > self.max_learned:
+                    self.reduce()
+                restarts += 1
+                budget = luby(restarts) * self.restart_unit
+            lit = self.decide()
+            if lit is None:
+                return True
+            self.stats['decisions'] += 1
+            self.trail_lim.append(len(self.trail))
+            self.assign(lit)
+
+SOLVERS = {'dpll': DPLL, 'cdcl': CDCL}
+
+def is_int_formula(formula):
+    """True for a CNF or a list of int clauses"""
+    if isinstance(formula,CNF):
+        return True
+    for clause in formula:
+        for lit in clause:
+            return isinstance(lit,int)
+    return False
+
+def solve_sat(formula,method = 'dpll'):
     """
-    Recursion: into the satisfying assignment 
+    Run satisfying_assignment with the given method ('dpll' or 'cdcl')
+    Returns (assignment or None, stats), where stats counts decisions,
+    conflicts and propagations (and learned/deleted clauses and
+    restarts for CDCL)
     """
-    new_form = new_formula(formula,var,boolean)
-    dict1 = satisfying_assignment(new_form)
-    if dict1 is not None:
-        dict1[var] = boolean
-        return dict1
-    return None
+    if is_int_formula(formula):
+        clauses = formula if isinstance(formula,CNF) else to_cnf(formula)
+        variables = None
+    else:
+        clauses, variables = literal_table(formula)
+    solver = SOLVERS[method](clauses,clauses.num_vars)
+    if not solver.solve():
+        return None, solver.stats
+    model = dict(enumerate(solver.model(),1))
+    return model if variables is None else variables.decode(model), solver.stats
 
-def satisfying_assignment(formula):
+def all_assignments(formula,method = 'dpll'):
+    """
+    Lazily yield every satisfying assignment of formula (same forms as
+    satisfying_assignment), continuing the same search after each one
+    """
+    if is_int_formula(formula):
+        clauses = formula if isinstance(formula,CNF) else to_cnf(formula)
+        variables = None
+    else:
+        clauses, variables = literal_table(formula)
+    solver = SOLVERS[method](clauses,clauses.num_vars,pure = False)
+    while solver.solve():
+        model = dict(enumerate(solver.model(),1))
+        yield model if variables is None else variables.decode(model)
+
+def satisfying_assignment(formula,method = 'dpll'):
     """
     Find a satisfying assignment for a given CNF formula.
     Returns that assignment if one exists, or None otherwise.
+
+    The formula is either a list of [((var),bool), ...] clauses, or
+    int clauses (a CNF or lists of signed ints, as in DIMACS); the
+    latter gives an {int: bool} assignment.  method='cdcl' switches
+    to clause learning for hard instances
     """
-    if len(formula) == 0:
-        return {}
-    formula.sort(key = len)
-    if not formula[0]:
-        return None
-    curr_var = formula[0][0][0]
-    for boo in bool_list:
-        result = recurse(formula,curr_var,boo)
-        if result is not None: return result
-    return None
+    return solve_sat(formula,method)[0]
+
+def constraint_groups(dimension):
+    """
+    Every group of (r,c,val) variables of which exactly one is true:
+    cells, rows, columns and subgrids
+    """
+    square, values = int(dimension ** 0.5), range(1,dimension+1)
+    for r in range(dimension):
+        for c in range(dimension):
+            yield [(r,c,val) for val in values]
+    for val in values:
+        for r in range(dimension):
+            yield [(r,c,val) for c in range(dimension)]
+            yield [(c,r,val) for c in range(dimension)]
+        for r in range(0,dimension,square):
+            for c in range(0,dimension,square):
+                yield [(s_r,s_c,val) for s_r in range(r,r+square)
+                    for s_c in range(c,c+square)]
 
-def cnf(l1):
+def cnf(lits):
     """
-    Returns cnf literals that say:
+    Returns int clauses that say:
     1) At least one of them have to be true
     2) Only one of them can be True
     """
-    return [[((coord),True) for coord in l1]] + [[(l1[c1],False),(l1[c2],False)]
-         for c1 in range(len(l1)) for c2 in range(c1+1,len(l1))]
-    
-def helper(dimension):
+    return [tuple(lits)] + [(-lits[c1],-lits[c2])
+        for c1 in range(len(lits)) for c2 in range(c1+1,len(lits))]
+
+@functools.lru_cache(maxsize = None)
+def base_formula(dimension):
     """
-    All the CNFs for cell constriction, row constriction,
-    and column constriction (but not subgrid)
+    The cell, row, column and subgrid clauses for a board of this size
+    (as SudokuVariables ints), built once and shared: a tuple of clause
+    tuples, plus a dict from each literal to the clauses it occurs in
     """
-    answer = []
-    for r in range(dimension):
-        for c in range(dimension):
-            answer += cnf([(r,c,val) for val in range(1,dimension+1)])
-        for val in range(1,dimension+1):
-            answer += cnf([(r,c,val) for c in range(dimension)])
-            answer += cnf([(c,r,val) for c in range(dimension)])
-    return answer,dimension
+    variables, clauses = SudokuVariables(dimension), []
+    for group in constraint_groups(dimension):
+        clauses += cnf([variables.number(var) for var in group])
+    occurs = {}
+    for index,clause in enumerate(clauses):
+        for lit in clause:
+            occurs.setdefault(lit,[]).append(index)
+    return tuple(clauses), {lit: tuple(where) for lit,where in occurs.items()}
 
-def subgrid(dimension,square):
+def simplify(clauses,occurs,units):
     """
-    Subgrid CNFs, going through each subgrid
+    Apply the unit literals (and whatever they force, by unit
+    propagation) to clauses: drop satisfied clauses and false literals
+    Returns the remaining clauses followed by a unit clause for every
+    assigned literal, or [[]] if the units contradict the clauses
     """
-    answer = []
-    for val in range(1,dimension+1):
-        for r in range(0,dimension,square):
-            for c in range(0,dimension,square):
-                answer += cnf([(s_r,s_c,val) for s_r in 
-                    range(r,r+square) for s_c in range(c,c+square)])
-    return answer
+    value, forced, queue = {}, [], list(units)
+    satisfied, false = set(), {}
+    while queue:
+        lit = queue.pop()
+        if abs(lit) in value:
+            if value[abs(lit)] != (lit > 0):
+                return [[]]
+            continue
+        value[abs(lit)] = lit > 0
+        forced.append(lit)
+        satisfied.update(occurs.get(lit,()))
+        for index in occurs.get(-lit,()):
+            if index in satisfied:
+                continue
+            false[index] = false.get(index,0) + 1
+            left = len(clauses[index]) - false[index]
+            if left == 0:
+                return [[]]
+            if left == 1:
+                queue.extend(q for q in clauses[index] if abs(q) not in value)
+    remaining = [[lit for lit in clause if abs(lit) not in value]
+        for index,clause in enumerate(clauses) if index not in satisfied]
+    return remaining + [[lit] for lit in forced]
 
 def already_there(sudoku_board,dimension):
     """
@@ -95,17 +793,48 @@ def already_there(sudoku_board,dimension):
     return [[((r,c,sudoku_board[r][c]),True)] for r in range(dimension)
         for c in range(dimension) if sudoku_board[r][c]]
 
+def formula_size(clauses):
+    """(number of clauses, number of literals)"""
+    return len(clauses), sum(map(len,clauses))
+
+def sudoku_board_to_int_formula(sudoku_board,sizes = None):
+    """
+    Same formula as sudoku_board_to_sat_formula, but packed as a CNF
+    of ints; returns (CNF, SudokuVariables).  Decode a solution with
+    variables.decode(satisfying_assignment(formula))
+
+    The shared base_formula is simplified with the givens up front; if
+    sizes is a dict, (clauses, literals) before and after simplifying
+    are stored in it under 'before' and 'after'
+    """
+    dimension = len(sudoku_board)
+    for row in sudoku_board:
+        for val in row:
+            if not 0 <= val <= dimension:
+                # out of range, it would name another cell's variable
+                raise ValueError(f'value {val!r} out of range for a {dimension}x{dimension} sudoku')
+    variables = SudokuVariables(dimension)
+    clauses, occurs = base_formula(dimension)
+    givens = [variables.number(var) for (var,_), in already_there(sudoku_board,dimension)]
+    simplified = simplify(clauses,occurs,givens)
+    if sizes is not None:
+        num_clauses, num_lits = formula_size(clauses)
+        sizes['before'] = (num_clauses + len(givens),num_lits + len(givens))
+        sizes['after'] = formula_size(simplified)
+    formula = CNF(len(variables))
+    for clause in simplified:
+        formula.add(clause)
+    return formula, variables
 
-def sudoku_board_to_sat_formula(sudoku_board):
+def sudoku_board_to_sat_formula(sudoku_board,sizes = None):
     """
     Generates a SAT formula that, when solved, represents a solution to the
     given sudoku board.  The result should be a formula of the right form to be
     passed to the satisfying_assignment function above.
     """
-    answer,dimension = helper(len(sudoku_board))
-    answer.extend(subgrid(dimension,int(dimension ** 0.5)))
-    answer.extend(already_there(sudoku_board,dimension))
-    return answer
+    formula, variables = sudoku_board_to_int_formula(sudoku_board,sizes)
+    names = [None] + [variables.variable(num) for num in range(1,len(variables)+1)]
+    return [[(names[abs(lit)],lit > 0) for lit in clause] for clause in formula]
 
 
 def assignments_to_sudoku_board(assignments, n):
@@ -125,29 +854,238 @@ def assignments_to_sudoku_board(assignments, n):
     return board
 
 
-def valid(board,row,col):
-    ro = [val for val in board[row] if val != 0]
-    co = [board[r][col] for r in range(len(board)) if board[r][col] != 0]
-    square = int(len(board)**(0.5))
-    sr, sc = (row//square)*square, (col//square)*square
-    subg = [board[r][c] for r in range(sr,sr+square) for c in range(sc,sc+square) if board[r][c] != 0]
-    cant = set(ro) | set(co) | set(subg)
-    return [val for val in range(1,len(board)+1) if val not in cant]
-      
-def solver(sudoku_board):
-    dimension = len(sudoku_board)
-    for row in range(dimension):
-        for col in range(dimension):
-            if sudoku_board[row][col] != 0:
+class BitmaskSolver:
+    """
+    Backtracking over bitmasks of the digits used in every row, column
+    and box (bit d-1 set = digit d used), updated on place/unplace.
+    Each node fills naked and hidden singles, then branches on the
+    cell with the fewest candidates.  Works for any n = k**2 board
+
+    To avoid heavy-tailed runs on big boards, a search that uses up its
+    node budget restarts with random tie-breaking and a larger budget
+
+    The search keeps its own stack of (cell, untried digits, singles
+    placed) frames, so it can be paused and resumed (see run)
+    """
+    first_budget, growth = 2000, 1.5
+
+    def __init__(self,sudoku_board,seed = 0):
+        n = len(sudoku_board)
+        square = int(n ** 0.5)
+        self.n, self.full = n, (1 << n) - 1
+        self.cells = [val for row in sudoku_board for val in row]
+        # unit indices: rows 0..n-1, columns n..2n-1, boxes 2n..3n-1
+        self.cell_units = [(r, n + c, 2 * n + (r // square) * square + c // square)
+            for r in range(n) for c in range(n)]
+        self.units = [[] for _ in range(3 * n)]
+        for i,units in enumerate(self.cell_units):
+            for u in units:
+                self.units[u].append(i)
+        self.used, self.ok = [0] * (3 * n), True
+        self.random, self.shuffle = random.Random(seed), False
+        self.nodes, self.budget = 0, self.first_budget
+        self.stack, self.expand = [], True
+        for i,val in enumerate(self.cells):
+            if val:
+                if not self.candidates(i) >> (val - 1) & 1:
+                    self.ok = False
+                self.place(i,val)
+
+    def place(self,i,val):
+        self.cells[i], bit, used = val, 1 << (val - 1), self.used
+        for u in self.cell_units[i]:
+            used[u] |= bit
+
+    def unplace(self,i):
+        bit, used = ~(1 << (self.cells[i] - 1)), self.used
+        for u in self.cell_units[i]:
+            used[u] &= bit
+        self.cells[i] = 0
+
+    def candidates(self,i):
+        a,b,c = self.cell_units[i]
+        used = self.used
+        return self.full & ~(used[a] | used[b] | used[c])
+
+    def undo(self,placed):
+        for i in placed:
+            self.unplace(i)
+
+    def propagate(self,placed):
+        """
+        Place naked singles (one candidate left) and hidden singles (a
+        digit with one possible cell in a unit) until none are left,
+        recording placements in placed
+        Returns the MRV cell and its candidates, (None, 0) if the board
+        is full, or None on a contradiction
+        """
+        cells, units, used, full = self.cells, self.units, self.used, self.full
+        while True:
+            progress, best, best_cand, fewest = False, None, 0, self.n + 1
+            ties = 0
+            for i,val in enumerate(cells):
+                if val:
+                    continue
+                cand = self.candidates(i)
+                if not cand:
+                    return None
+                count = cand.bit_count()
+                if count == 1:
+                    self.place(i,cand.bit_length())
+                    placed.append(i)
+                    progress = True
+                elif count < fewest:
+                    best, best_cand, fewest, ties = i, cand, count, 1
+                elif count == fewest and self.shuffle:
+                    ties += 1
+                    if self.random.randrange(ties) == 0:
+                        best, best_cand = i, cand
+            if progress:
                 continue
-            for trial in valid(sudoku_board,row,col):
-                sudoku_board[row][col] = trial
-                result = solver(sudoku_board)
-                if result is not None:
-                    return result
-            sudoku_board[row][col] = 0
-            return None
-    return sudoku_board   
+            if best is None:
+                return None, 0
+            for u,unit in enumerate(units):
+                once = twice = 0
+                for i in unit:
+                    if not cells[i]:
+                        cand = self.candidates(i)
+                        twice |= once & cand
+                        once |= cand
+                if once | used[u] != full:
+                    return None
+                hidden = once & ~twice
+                if hidden:
+                    bit = hidden & -hidden
+                    i = next(i for i in unit if not cells[i] and self.candidates(i) & bit)
+                    self.place(i,bit.bit_length())
+                    placed.append(i)
+                    progress = True
+            if not progress:
+                return best, best_cand
+
+    def branch(self,i,cand):
+        """Digits to try at cell i, in the order they are popped"""
+        digits = []
+        while cand:
+            bit = cand & -cand
+            cand ^= bit
+            digits.append(bit.bit_length())
+        if self.shuffle:
+            self.random.shuffle(digits)
+        digits.reverse()
+        return digits
+
+    def restart(self):
+        """Unwind the whole stack and start again with a bigger budget"""
+        for i,_,placed in reversed(self.stack):
+            if i is not None:
+                self.unplace(i)
+            self.undo(placed)
+        self.stack, self.expand, self.nodes = [], True, 0
+        self.budget = int(self.budget * self.growth)
+        self.shuffle = True
+
+    def run(self,steps = None,deadline = None):
+        """
+        Advance the search by at most steps nodes, or until time.time()
+        passes deadline
+        Returns True (solved, solution in self.cells), False (no
+        solution), or None if interrupted; calling run again resumes,
+        also after a solution (to look for the next one)
+        """
+        stack = self.stack
+        while True:
+            if self.expand:
+                if steps is not None:
+                    if steps <= 0:
+                        return None
+                    steps -= 1
+                if deadline is not None and time.time() > deadline:
+                    return None
+                self.nodes += 1
+                if self.nodes > self.budget:
+                    self.restart()
+                    continue
+                placed = []
+                found = self.propagate(placed)
+                self.expand = False
+                if found is None:
+                    self.undo(placed)
+                elif found[0] is None:
+                    stack.append((None,[],placed))
+                    return True
+                else:
+                    stack.append((found[0],self.branch(*found),placed))
+            if not stack:
+                return False
+            i,digits,placed = stack[-1]
+            if i is not None and self.cells[i]:
+                self.unplace(i)
+            if digits:
+                self.place(i,digits.pop())
+                self.expand = True
+            else:
+                self.undo(placed)
+                stack.pop()
+
+    def solve(self,time_limit = None):
+        """
+        Search (with restarts) until solved or proven unsolvable
+        Returns True if solved (the solution is in self.cells), False if
+        not, or None if time_limit seconds ran out first
+        """
+        if not self.ok:
+            return False
+        deadline = None if time_limit is None else time.time() + time_limit
+        return self.run(deadline = deadline)
+
+    def solutions(self):
+        """Lazily yield every solution (as a board), without restarts"""
+        if not self.ok:
+            return
+        self.budget = float('inf')
+        while self.run():
+            yield self.board()
+
+    def board(self):
+        n = self.n
+        return [self.cells[r * n:(r + 1) * n] for r in range(n)]
+
+def solver(sudoku_board):
+    """
+    Solve the board in place with the BitmaskSolver
+    Returns the filled board, or None if it has no solution
+    """
+    search = BitmaskSolver(sudoku_board)
+    if not search.solve():
+        return None
+    for row,values in zip(sudoku_board,search.board()):
+        row[:] = values
+    return sudoku_board
+
+def sudoku_solutions(sudoku_board,method = 'backtrack'):
+    """
+    Lazily yield every solution of the board: by backtracking, or with
+    method 'dpll'/'cdcl' by continuing the SAT search after each model
+    """
+    if method == 'backtrack':
+        yield from BitmaskSolver(sudoku_board).solutions()
+        return
+    formula, variables = sudoku_board_to_int_formula(sudoku_board)
+    for assignment in all_assignments(formula,method):
+        yield assignments_to_sudoku_board(variables.decode(assignment),len(sudoku_board))
+
+def count_solutions(sudoku_board,limit = 2,method = 'backtrack'):
+    """
+    Number of solutions, stopping as soon as limit are found (so with
+    the default, 0, 1 or 2 means none, unique, or several)
+    """
+    count = 0
+    for _ in sudoku_solutions(sudoku_board,method):
+        count += 1
+        if count == limit:
+            break
+    return count
 
 if __name__ == '__main__':
     board = [
@@ -162,7 +1100,9 @@ if __name__ == '__main__':
         [4,0,0,0,0,0,0,0,2]
     ]
     t0 = time.time()
-    two_cnf = sudoku_board_to_sat_formula(board)
+    sizes = {}
+    two_cnf = sudoku_board_to_sat_formula(board,sizes)
+    print('clauses, literals:',sizes['before'],'->',sizes['after'])
     solved = satisfying_assignment(two_cnf)
     new_board = assignments_to_sudoku_board(solved,len(board))
     print(*new_board,sep="\n")
@@ -0,0 +1,188 @@
+"""
+Batch sudoku solving: streams one-puzzle-per-line files (81 chars for
+9x9, '.' or '0' for blanks, letters for digits past 9 on bigger boards)
+through a process pool in chunks, writing solutions back in input order
+(or as they finish)
+
+    python sudoku_batch.py puzzles.txt -o solutions.txt --workers 4
+    cat puzzles.txt | python sudoku_batch.py - --unordered
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import sys
+import time
+
+import sudoku
+
+BLANKS = '.0'
+DIGITS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def parse_puzzle(line):
+    """One puzzle line -> n-by-n board (list of lists, 0 for blanks)"""
+    n = int(round(len(line) ** 0.5))
+    if n * n != len(line) or int(round(n ** 0.5)) ** 2 != n:
+        raise ValueError(f'not a square sudoku: {line!r}')
+    cells = [0 if ch in BLANKS else DIGITS.find(ch.upper()) + 1 for ch in line]
+    for ch,val in zip(line,cells):
+        if not 0 < val <= n and ch not in BLANKS:
+            raise ValueError(f'symbol {ch!r} is not a digit of a {n}x{n} sudoku')
+    return [cells[r * n:(r + 1) * n] for r in range(n)]
+
+def format_board(board):
+    """Inverse of parse_puzzle (blanks written as '.')"""
+    return ''.join(DIGITS[val - 1] if val else '.' for row in board for val in row)
+
+def solve_board(board,method = 'auto',steps = 20_000):
+    """
+    Solve one board with the chosen method:
+    'backtrack' (sudoku.solver), 'sat' (CDCL over the int formula), or
+    'auto': backtracking for up to steps nodes, then SAT
+    Returns (solved board or None, method used)
+    """
+    if method in ('auto','backtrack'):
+        search = sudoku.BitmaskSolver(board)
+        result = search.run(steps = steps if method == 'auto' else None) if search.ok else False
+        if result is not None:
+            return (search.board() if result else None), 'backtrack'
+    formula, variables = sudoku.sudoku_board_to_int_formula(board)
+    assignment = sudoku.satisfying_assignment(formula,'cdcl')
+    return sudoku.assignments_to_sudoku_board(variables.decode(assignment),len(board)), 'sat'
+
+def solve_line(line,method = 'auto'):
+    """
+    Returns (solution line or None, seconds taken, method used);
+    lines that do not parse come back as (None, 0.0, 'invalid')
+    """
+    start = time.perf_counter()
+    try:
+        board = parse_puzzle(line)
+    except ValueError:
+        return None, 0.0, 'invalid'
+    solved, used = solve_board(board,method)
+    seconds = time.perf_counter() - start
+    return (format_board(solved) if solved else None), seconds, used
+
+def solve_chunk(chunk,method):
+    """Worker: solve a list of (index, line) pairs"""
+    return [(index,) + solve_line(line,method) for index,line in chunk]
+
+def read_puzzles(file):
+    """Yield (index, puzzle line) for every non-blank, non-comment line"""
+    for index,line in enumerate(file):
+        line = line.strip()
+        if line and line[0] != '#':
+            yield index, line
+
+def chunks(items,size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items,size))
+        if not chunk:
+            return
+        yield chunk
+
+def solve_stream(puzzles,method = 'auto',workers = None,chunk_size = 256,ordered = True):
+    """
+    Solve (index, line) pairs, yielding (index, solution or None,
+    seconds, method used) for each one
+    Only 2 * workers chunks are in flight at a time, so memory stays flat
+    however long the input is.  workers=0 solves in this process
+    """
+    if workers == 0:
+        for chunk in chunks(puzzles,chunk_size):
+            yield from solve_chunk(chunk,method)
+        return
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        limit = 2 * workers
+        pending = collections.deque() if ordered else set()
+        for chunk in chunks(puzzles,chunk_size):
+            future = pool.submit(solve_chunk,chunk,method)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+            while len(pending) >= limit:
+                if ordered:
+                    yield from pending.popleft().result()
+                else:
+                    done, pending = concurrent.futures.wait(pending,
+                        return_when = concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+        if ordered:
+            for future in pending:
+                yield from future.result()
+        else:
+            for future in concurrent.futures.as_completed(pending):
+                yield from future.result()
+
+class BatchStats:
+    """Running totals over a batch (constant memory)"""
+    def __init__(self):
+        self.count = self.solved = self.invalid = 0
+        self.latency, self.slowest = 0.0, 0.0
+        self.methods = collections.Counter()
+        self.start = time.perf_counter()
+
+    def add(self,solution,seconds,method):
+        self.count += 1
+        self.solved += solution is not None
+        self.invalid += method == 'invalid'
+        self.latency += seconds
+        self.slowest = max(self.slowest,seconds)
+        self.methods[method] += 1
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        return {
+            'puzzles': self.count,
+            'solved': self.solved,
+            'invalid': self.invalid,
+            'methods': dict(self.methods),
+            'seconds': elapsed,
+            'puzzles_per_second': self.count / elapsed if elapsed else 0.0,
+            'mean_latency': self.latency / self.count if self.count else 0.0,
+            'max_latency': self.slowest,
+        }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('input',help = "puzzle file, or '-' for stdin")
+    parser.add_argument('-o','--output',help = 'solution file (default stdout)')
+    parser.add_argument('-m','--method',default = 'auto',choices = ('auto','backtrack','sat'))
+    parser.add_argument('-w','--workers',type = int,default = None,
+        help = 'worker processes (default: one per CPU, 0: no pool)')
+    parser.add_argument('-c','--chunk-size',type = int,default = 256)
+    parser.add_argument('--unordered',action = 'store_true',
+        help = 'write results as they finish, prefixed with the input line number')
+    parser.add_argument('--latency',help = 'write "line,seconds,method" per puzzle to this file')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    out = sys.stdout if args.output is None else open(args.output,'w')
+    latency = open(args.latency,'w') if args.latency else None
+    stats = BatchStats()
+    try:
+        results = solve_stream(read_puzzles(source),args.method,args.workers,
+            args.chunk_size,not args.unordered)
+        for index,solution,seconds,method in results:
+            stats.add(solution,seconds,method)
+            line = solution or ('invalid' if method == 'invalid' else 'unsolvable')
+            out.write(f'{index}\t{line}\n' if args.unordered else line + '\n')
+            if latency:
+                latency.write(f'{index},{seconds:.6f},{method}\n')
+    finally:
+        for file in (source,out,latency):
+            if file not in (None,sys.stdin,sys.stdout):
+                file.close()
+    for key,val in stats.report().items():
+        print(f'{key}: {val}',file = sys.stderr)
+    return stats
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Solution cache for sudoku keyed on a canonical form: boards that are the
+same up to digit relabeling, row swaps within a band, column swaps within
+a stack, band/stack swaps and transposition share one cache entry
+"""
+import collections
+import itertools
+import math
+import shelve
+
+import sudoku
+
+
+def tied_orders(items,key):
+    """
+    Every order of items sorted by key, where only items with equal keys
+    may swap places
+    """
+    groups = collections.defaultdict(list)
+    for item in items:
+        groups[key(item)].append(item)
+    choices = [list(itertools.permutations(groups[sig])) for sig in sorted(groups)]
+    return [sum(choice,()) for choice in itertools.product(*choices)]
+
+def count_orders(lines,bands,k):
+    """Number of orders tied_orders allows for bands, then lines in each band"""
+    count = 1
+    for group in collections.Counter(bands).values():
+        count *= math.factorial(group)
+    for band in range(k):
+        for group in collections.Counter(lines[band * k:band * k + k]).values():
+            count *= math.factorial(group)
+    return count
+
+def signatures(grid,freq,k):
+    """
+    Relabeling-invariant signatures of the rows of grid (each row's
+    sorted digit frequencies, 0 for blanks) and of its bands (their
+    sorted row signatures)
+    """
+    lines = [tuple(sorted(freq[val] for val in row)) for row in grid]
+    bands = [tuple(sorted(lines[b * k:b * k + k])) for b in range(k)]
+    return lines, bands
+
+def allowed(used,lines,bands,need,k):
+    """
+    Rows that may come next after used: the rest of the current band, or
+    a row of a band not started yet, in either case with the signature
+    the sorted order needs at this position
+    """
+    i = len(used)
+    if i % k:
+        band = used[-1] // k
+        rows = range(band * k,band * k + k)
+    else:
+        started = {u // k for u in used}
+        rows = [x for x in range(k * k) if x // k not in started and bands[x // k] == need[1][i // k]]
+    return [x for x in rows if x not in used and lines[x] == need[0][i]]
+
+def relabel(values,labels,nxt,blank):
+    """
+    Symbols for values under the digit labels so far (digits not seen
+    yet get the next labels, blanks sort last)
+    Returns the symbols and the extended labels and next label
+    """
+    symbols, labels = [], list(labels)
+    for val in values:
+        if not val:
+            symbols.append(blank)
+            continue
+        if not labels[val]:
+            labels[val], nxt = nxt, nxt + 1
+        symbols.append(labels[val])
+    return tuple(symbols), tuple(labels), nxt
+
+def canonical_form(sudoku_board,max_states = 20_000):
+    """
+    The lexicographically smallest board (row by row, digits relabeled
+    in order of appearance, blanks last) over the symmetries that leave
+    the bands, rows, stacks and columns sorted by their invariant
+    signatures (see signatures), so only lines with equal signatures
+    are searched over
+    Returns (canonical board, transform), where transform is
+    (transposed, rows, cols, labels): canonical[i][j] is
+    labels[grid[rows[i]][cols[j]]] with grid the (maybe transposed)
+    board.  Returns None, before doing the search, if it could need more
+    than max_states partial transforms (boards with many lines alike,
+    such as nearly empty or full ones)
+    """
+    n = len(sudoku_board)
+    k, blank = int(n ** 0.5), n + 1
+    freq = [0] * (n + 1)
+    for row in sudoku_board:
+        for val in row:
+            freq[val] += 1
+    freq[0] = 0
+    grids = (sudoku_board,[list(col) for col in zip(*sudoku_board)])
+    sigs = [signatures(grid,freq,k) for grid in grids]
+    # the transposition with the smaller sorted signatures, or both if equal
+    keys = [(sorted(sigs[t][1]),sorted(sigs[1 - t][1])) for t in (0,1)]
+    frames = [t for t in (0,1) if keys[t] == min(keys)]
+    need = {t: ([sig for band in sorted(sigs[t][1]) for sig in band],sorted(sigs[t][1])) for t in frames}
+    # columns are pinned up to ties; count before paying for the search
+    estimate = 0
+    for t in frames:
+        cols, bands = sigs[1 - t]
+        estimate += count_orders(cols,bands,k) * len(allowed((),*sigs[t],need[t],k))
+    if estimate > max_states:
+        return None
+    states = []
+    for t in frames:
+        cols, bands = sigs[1 - t]
+        band_orders = tied_orders(range(k),bands.__getitem__)
+        for band_order in band_orders:
+            inner = [tied_orders(range(b * k,b * k + k),cols.__getitem__) for b in band_order]
+            for choice in itertools.product(*inner):
+                states.append((t,(),sum(choice,()),(0,) * (n + 1),1))
+    # then the rows, a whole row at a time
+    for _ in range(n):
+        best, keep = None, []
+        for t,rows,cols,labels,nxt in states:
+            grid = grids[t]
+            for r in allowed(rows,*sigs[t],need[t],k):
+                symbols, new_labels, new_nxt = relabel([grid[r][c] for c in cols],labels,nxt,blank)
+                if best is None or symbols < best:
+                    best, keep = symbols, []
+                if symbols == best:
+                    keep.append((t,rows + (r,),cols,new_labels,new_nxt))
+        if len(keep) > max_states:
+            return None
+        states = keep
+    t,rows,cols,labels,nxt = states[0]
+    labels = list(labels)
+    for digit in range(1,n + 1):
+        if not labels[digit]:
+            labels[digit], nxt = nxt, nxt + 1
+    transform = (t,rows,cols,tuple(labels))
+    return apply_transform(sudoku_board,transform), transform
+
+def apply_transform(sudoku_board,transform):
+    """Board -> canonical frame"""
+    t,rows,cols,labels = transform
+    grid = [list(col) for col in zip(*sudoku_board)] if t else sudoku_board
+    return [[labels[grid[r][c]] for c in cols] for r in rows]
+
+def invert_transform(canonical_board,transform):
+    """Canonical frame -> original board (inverse of apply_transform)"""
+    t,rows,cols,labels = transform
+    digits = [0] * len(labels)
+    for digit,label in enumerate(labels):
+        digits[label] = digit
+    n = len(canonical_board)
+    grid = [[0] * n for _ in range(n)]
+    for i,r in enumerate(rows):
+        for j,c in enumerate(cols):
+            grid[r][c] = digits[canonical_board[i][j]]
+    return [list(col) for col in zip(*grid)] if t else grid
+
+def solve_with(method):
+    """Solver function for a method name ('backtrack', 'dpll', 'cdcl')"""
+    if method == 'backtrack':
+        return lambda board: sudoku.solver([row[:] for row in board])
+    def solve(board):
+        formula, variables = sudoku.sudoku_board_to_int_formula(board)
+        assignment = variables.decode(sudoku.satisfying_assignment(formula,method))
+        return sudoku.assignments_to_sudoku_board(assignment,len(board))
+    return solve
+
+class SolutionCache:
+    """
+    Bounded LRU of canonical board -> canonical solution (None for
+    unsolvable boards) in front of the sudoku solvers.  With a path,
+    entries are also kept in a shelve file, which is checked on an
+    in-memory miss and survives evictions and restarts.  A second
+    bounded LRU keyed on the board exactly as given answers repeated
+    boards without canonicalizing them
+
+    stats counts exact hits, hits, misses, evictions, disk hits, and
+    bypasses (boards too symmetric to canonicalize cheaply, solved
+    without the canonical cache)
+    """
+    def __init__(self,maxsize = 10_000,method = 'backtrack',path = None):
+        self.maxsize, self.solve_board = maxsize, solve_with(method)
+        self.entries = collections.OrderedDict()
+        self.exact = collections.OrderedDict()
+        self.disk = shelve.open(path) if path else None
+        self.stats = {'exact_hits': 0, 'hits': 0, 'misses': 0, 'evictions': 0,
+            'disk_hits': 0, 'bypasses': 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def lookup(self,key):
+        """(found, canonical solution) from memory, then disk"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, self.entries[key]
+        if self.disk is not None and key in self.disk:
+            self.stats['disk_hits'] += 1
+            self.remember(key,self.disk[key],False)
+            return True, self.entries[key]
+        self.stats['misses'] += 1
+        return False, None
+
+    def remember(self,key,solution,write = True):
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        if write and self.disk is not None:
+            self.disk[key] = solution
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last = False)
+            self.stats['evictions'] += 1
+
+    def solve(self,sudoku_board):
+        """
+        Solved copy of the board (the board itself is not changed), or
+        None if it has no solution
+        """
+        exact_key = bytes(val for row in sudoku_board for val in row)
+        if exact_key in self.exact:
+            self.exact.move_to_end(exact_key)
+            self.stats['exact_hits'] += 1
+            solution = self.exact[exact_key]
+            return None if solution is None else [row[:] for row in solution]
+        found = canonical_form(sudoku_board)
+        if found is None:
+            self.stats['bypasses'] += 1
+            solution = self.solve_board(sudoku_board)
+        else:
+            canonical, transform = found
+            key = bytes(val for row in canonical for val in row).hex()
+            hit, solution = self.lookup(key)
+            if not hit:
+                solution = self.solve_board(canonical)
+                self.remember(key,solution)
+            if solution is not None:
+                solution = invert_transform(solution,transform)
+        self.exact[exact_key] = None if solution is None else [row[:] for row in solution]
+        if len(self.exact) > self.maxsize:
+            self.exact.popitem(last = False)
+        return solution